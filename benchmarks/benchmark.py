@@ -0,0 +1,140 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import re
+import resource
+import sys
+from typing import Dict, List, Tuple
+
+# Run as a script the repository is not on the path, and spawned workers
+# import qsc from the path they inherit from this process.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROWS = [1, 2, 3, 4]
+WIDTHS = [1, 1.25, 1.5, 1.75, 2, 2.25, 2.75, 6.25, 7]
+
+
+def matrix() -> List[Tuple[str, Dict]]:
+    configs = []
+    for row in ROWS:
+        for width in WIDTHS:
+            configs.append((f"r{row}_{width}u", {"row": row, "width": width}))
+            configs.append((f"r{row}_{width}u_inverted", {"row": row, "width": width, "inverted": True}))
+            configs.append((f"r{row}_{width}u_stepped", {"row": row, "width": width, "stepped": True}))
+        configs.append((f"r{row}_iso_enter", {"row": row, "iso_enter": True}))
+        configs.append((f"r{row}_iso_enter_stepped", {"row": row, "iso_enter": True, "stepped": True}))
+        for homing in ["bar", "dot", "scooped"]:
+            configs.append((f"r{row}_1u_homing_{homing}", {"row": row, "width": 1, "homing": homing}))
+        configs.append((f"r{row}_1u_legend", {"row": row, "width": 1, "legend": "A", "font_size": 6}))
+        configs.append((f"r{row}_2.25u_legend", {"row": row, "width": 2.25, "legend": "Shift", "font_size": 4}))
+    return configs
+
+
+def _run(config: Tuple[str, Dict]) -> Tuple[str, Dict]:
+    from qsc import BuildRecorder, qsc_from_dict
+
+    name, spec = config
+    with BuildRecorder() as recorder:
+        qsc_from_dict(spec).build()
+
+    total = next(e for e in recorder.events if e.stage == "build")
+    return name, {
+        "spec": spec,
+        "wall": total.wall,
+        "cpu": total.cpu,
+        "faces": total.faces,
+        "edges": total.edges,
+        "booleans": total.booleans,
+        "fillets": total.fillets,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "stages": {e.stage: {"wall": e.wall, "cpu": e.cpu} for e in recorder.events if e.stage != "build"},
+    }
+
+
+def run(args) -> int:
+    configs = [c for c in matrix() if re.search(args.filter, c[0])]
+    if args.dish is not None:
+        # Same names on purpose, so two runs with different dishes can be compared
+        configs = [(name, {**spec, "dish_type": args.dish}) for name, spec in configs]
+    # A fresh process per configuration keeps peak RSS and warm-up per cap
+    ctx = multiprocessing.get_context("spawn")
+    results: Dict[str, Dict] = {}
+    with ctx.Pool(processes=args.workers, maxtasksperchild=1) as pool:
+        for _ in range(args.repeat):
+            for name, result in pool.imap_unordered(_run, configs):
+                if name not in results or result["wall"] < results[name]["wall"]:
+                    results[name] = result
+                print(f"{name:32} {result['wall']:8.2f}s {result['peak_rss_kb'] / 1024:8.1f}MB {result['faces']:5} faces", flush=True)
+
+    import cadquery
+    import qsc
+
+    baseline = {
+        "meta": {
+            "qsc": qsc.__version__,
+            "cadquery": cadquery.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": dict(sorted(results.items())),
+    }
+    with open(args.output, "w") as f:
+        json.dump(baseline, f, indent=2)
+    return 0
+
+
+def compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.current) as f:
+        current = json.load(f)["results"]
+
+    regressions = []
+    for name in sorted(set(baseline) & set(current)):
+        old, new = baseline[name], current[name]
+        checks = [("wall", old["wall"], new["wall"]), ("peak_rss_kb", old["peak_rss_kb"], new["peak_rss_kb"])]
+        for stage in sorted(set(old["stages"]) & set(new["stages"])):
+            checks.append((stage, old["stages"][stage]["wall"], new["stages"][stage]["wall"]))
+        for what, before, after in checks:
+            # Tiny stages are all noise, only flag what is worth a look
+            if before > args.min_seconds and after > before * (1 + args.threshold):
+                regressions.append((name, what, before, after))
+        if old["faces"] != new["faces"]:
+            print(f"{name}: face count changed {old['faces']} -> {new['faces']}")
+
+    for name in sorted(set(baseline) ^ set(current)):
+        print(f"{name}: only in {'baseline' if name in baseline else 'current'}")
+
+    for name, what, before, after in regressions:
+        print(f"REGRESSION {name} {what}: {before:.2f} -> {after:.2f} ({(after / before - 1) * 100:+.0f}%)")
+    print(f"{len(regressions)} regression(s) above {args.threshold * 100:.0f}%")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="QSC build benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="build the benchmark matrix and write a baseline")
+    run_parser.add_argument("--output", default="bench_baseline.json")
+    run_parser.add_argument("--filter", default=".", help="regex on configuration names")
+    run_parser.add_argument("--workers", type=int, default=1)
+    run_parser.add_argument("--repeat", type=int, default=1)
+    run_parser.add_argument("--dish", help="dish type for every configuration, e.g. revolved_ellipse")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="compare two baselines")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.15)
+    compare_parser.add_argument("--min-seconds", type=float, default=0.05)
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,15 @@
+__version__ = 0.1
+
 from .percentage import Percentage
 from .constants import Constants
 from .homing_type import HomingType
+from .hollow_type import HollowType
 from .mm import MM
 from .stem import (
     CherrySettings,
     StemSettings,
     Support,
+    SupportMode,
     Stem,
     StemType,
 )
@@ -13,27 +17,65 @@ from .legend import (
     Legend,
     LegendSettings
 )
+from .dish_type import DishType
 from .dish import Dish
 from .homing import Homing
+from .quality import Quality
 from .rounding_type import RoundingType
 from .raised_position import RaisedPosition
 from .step_settings import StepSettings
 from .step_type import StepType
 from .u import U
+from .cache import BuildCache, MemoryCache
+from .instrumentation import BuildEvent, BuildRecorder
+from .spec import QSCSpec
+from .dimensions import Dimensions, dimensions, envelopes
+from .mesh import cap_mesh
 from .qsc import QSC
+from .manifest import Manifest
+from .keyset import Keyset, qsc_from_dict
+from .fillet_limits import FilletLimits
+from .plate import Plate, shelf_pack
+from .validation import Issue, validate
+
+# The build server and the asyncio API pull in http.server, asyncio and
+# multiprocessing, so they are only imported when first used.
+_LAZY = {
+    "BuildServer": "server",
+    "BuildClient": "server",
+    "AsyncBuilder": "aio",
+    "build_many_async": "aio",
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module("." + _LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
 
 __all__ = {
     "Percentage",
     "Constants",
     "HomingType",
+    "HollowType",
     "CherrySettings",
     "MM",
     "QSC",
+    "QSCSpec",
+    "Dimensions",
+    "dimensions",
+    "envelopes",
+    "cap_mesh",
+    "Quality",
     "RoundingType",
     "StemSettings",
     "StemType",
     "Support",
-    "StepPosition"
+    "SupportMode",
+    "RaisedPosition",
     "StepType",
     "StepSettings",
     "U",
@@ -41,7 +83,22 @@ __all__ = {
     "Legend",
     "LegendSettings",
     "Dish",
+    "DishType",
     "Homing",
+    "BuildCache",
+    "MemoryCache",
+    "Keyset",
+    "Manifest",
+    "qsc_from_dict",
+    "FilletLimits",
+    "Plate",
+    "shelf_pack",
+    "Issue",
+    "validate",
+    "BuildEvent",
+    "BuildRecorder",
+    "BuildServer",
+    "BuildClient",
+    "AsyncBuilder",
+    "build_many_async",
 }
-
-__version__ = 0.1
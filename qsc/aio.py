@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from qsc.cache import BuildCache, shape_from_brep
+from qsc.keyset import build_brep, qsc_from_dict
+from qsc.lazy import cq
+from qsc.qsc import QSC
+from qsc.spec import QSCSpec
+from qsc.types import Real
+
+T = TypeVar("T", bound="AsyncBuilder")
+
+Built = Tuple["cq.Workplane", Optional["cq.Workplane"]]
+
+
+class AsyncBuilder(object):
+    # OCCT can not be interrupted mid-operation, so a build that times out
+    # keeps its worker busy. Its pool is retired: new jobs go to a fresh pool,
+    # the builds already running in the old one finish normally and the old
+    # pool is terminated once the last of them is done. Until then both pools
+    # run, one worker over the limit.
+    _workers: int = None
+    _timeout: Real = None
+    _cache: BuildCache = None
+
+    def __init__(self, workers: int = None, timeout: Real = None):
+        if workers is not None:
+            self._workers = workers
+        if timeout is not None:
+            self._timeout = timeout
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._generation = 0
+        self._pools: Dict[int, ProcessPoolExecutor] = {}
+        self._live: Dict[int, int] = {}
+        self._semaphores: Dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+
+    def workers(self, workers: int) -> T:
+        self._workers = workers
+        return self
+
+    def timeout(self, timeout: Real) -> T:
+        self._timeout = timeout
+        return self
+
+    def cache(self, cache: BuildCache) -> T:
+        self._cache = cache
+        return self
+
+    def get_workers(self) -> int:
+        return self._workers or os.cpu_count() or 1
+
+    async def build(self, cap: QSC | QSCSpec | Dict, timeout: Real = None) -> Built:
+        spec = self._spec(cap)
+        async with self._semaphore():
+            c, legend = await self._submit(spec, self._timeout if timeout is None else timeout)
+        return (
+            cq.Workplane("XY").add(shape_from_brep(c)),
+            None if legend is None else cq.Workplane("XY").add(shape_from_brep(legend)),
+        )
+
+    async def build_many(self, caps: Iterable[QSC | QSCSpec | Dict], timeout: Real = None, return_exceptions: bool = False) -> List[Built | BaseException]:
+        # Specs are parsed up front so a typo fails the batch before anything is built
+        specs = [self._spec(c) for c in caps]
+        return await asyncio.gather(*(self.build(s, timeout) for s in specs), return_exceptions=return_exceptions)
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            retired = [p for p in self._pools.values() if p is not pool]
+            self._pools.clear()
+            self._live.clear()
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        for p in retired:
+            _terminate(p)
+
+    async def __aenter__(self) -> T:
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def _spec(cap: QSC | QSCSpec | Dict) -> QSCSpec:
+        if isinstance(cap, QSCSpec):
+            return cap
+        return (qsc_from_dict(cap) if isinstance(cap, dict) else cap).spec()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Jobs queue here rather than inside the pool, so a timeout only counts time spent building
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                self._semaphores = {l: s for l, s in self._semaphores.items() if not l.is_closed()}
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.get_workers())
+        return semaphore
+
+    def _executor(self) -> Tuple[ProcessPoolExecutor, int]:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.get_workers(), mp_context=multiprocessing.get_context("spawn"))
+                self._generation += 1
+                self._pools[self._generation] = self._pool
+            self._live[self._generation] = self._live.get(self._generation, 0) + 1
+            return self._pool, self._generation
+
+    def _retire(self, generation: int) -> bool:
+        # True when this call took the pool out of service, False when it already was
+        with self._lock:
+            if self._pool is None or self._pools.get(generation) is not self._pool:
+                return False
+            self._pool = None
+            return True
+
+    def _release(self, generation: int):
+        with self._lock:
+            if generation not in self._live:
+                return
+            self._live[generation] -= 1
+            pool = self._pools[generation]
+            if self._live[generation] > 0 or pool is self._pool:
+                return
+            del self._live[generation], self._pools[generation]
+        _terminate(pool)
+
+    async def _submit(self, spec: QSCSpec, timeout: Optional[Real]) -> Tuple[bytes, Optional[bytes]]:
+        pool, generation = self._executor()
+        future = None
+        try:
+            future = pool.submit(build_brep, spec, self._cache)
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except BrokenProcessPool:
+            # A dead worker breaks every job in its pool and there is no
+            # telling which one killed it. Each of them is built once more in
+            # a pool of its own, where only the culprit breaks again.
+            self._retire(generation)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            if future is not None and future.running():
+                self._retire(generation)
+            raise
+        finally:
+            self._release(generation)
+        return await self._isolated(spec, timeout)
+
+    async def _isolated(self, spec: QSCSpec, timeout: Optional[Real]) -> Tuple[bytes, Optional[bytes]]:
+        pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(pool.submit(build_brep, spec, self._cache)), timeout)
+        finally:
+            _terminate(pool)
+
+def _terminate(pool: ProcessPoolExecutor):
+    terminate = getattr(pool, "terminate_workers", None)
+    if terminate is not None:
+        terminate()
+    else:
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+_default: Optional[AsyncBuilder] = None
+_defaultLock = threading.Lock()
+
+
+def default_builder() -> AsyncBuilder:
+    global _default
+    with _defaultLock:
+        if _default is None:
+            _default = AsyncBuilder()
+        return _default
+
+
+async def build_many_async(caps: Iterable[QSC | Dict], timeout: Real = None, return_exceptions: bool = False) -> List[Built | BaseException]:
+    return await default_builder().build_many(caps, timeout, return_exceptions)
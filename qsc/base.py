@@ -1,4 +1,6 @@
-import cadquery as cq
+from __future__ import annotations
+
+from qsc.lazy import cq
 from qsc.types import Real
 from qsc.step_settings import StepSettings
 from qsc.step_type import StepType
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from io import BytesIO
+from typing import Callable, List, Optional
+
+from qsc.lazy import cq
+
+_MAGIC = b"QSC1\n"
+
+
+def shape_to_brep(shape: cq.Shape) -> bytes:
+    stream = BytesIO()
+    shape.exportBrep(stream)
+    return stream.getvalue()
+
+
+def shape_from_brep(data: bytes) -> cq.Shape:
+    return cq.Shape.importBrep(BytesIO(data))
+
+
+def pack(blobs: List[Optional[bytes]]) -> bytes:
+    header = json.dumps([None if b is None else len(b) for b in blobs]).encode("utf-8")
+    return _MAGIC + header + b"\n" + b"".join(b for b in blobs if b is not None)
+
+
+def unpack(data: bytes) -> List[Optional[bytes]]:
+    if not data.startswith(_MAGIC):
+        raise ValueError("Not a QSC container")
+    end = data.index(b"\n", len(_MAGIC))
+    lengths = json.loads(data[len(_MAGIC):end].decode("utf-8"))
+    blobs = []
+    offset = end + 1
+    for length in lengths:
+        if length is None:
+            blobs.append(None)
+            continue
+        blob = data[offset:offset + length]
+        if len(blob) != length:
+            raise ValueError("Truncated QSC container")
+        blobs.append(blob)
+        offset += length
+    return blobs
+
+
+class BuildCache(object):
+    _directory: str = None
+    _maxBytes: int = 512 * 1024 * 1024
+
+    def __init__(self, directory: str = None, max_bytes: int = None):
+        if directory is None:
+            directory = os.path.join(os.path.expanduser("~"), ".cache", "qsc")
+        self._directory = directory
+        if max_bytes is not None:
+            self._maxBytes = max_bytes
+        os.makedirs(self._directory, exist_ok=True)
+
+    def get_directory(self) -> str:
+        return self._directory
+
+    def get_max_bytes(self) -> int:
+        return self._maxBytes
+
+    def get(self, key: str) -> Optional[List[Optional[cq.Shape]]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            shapes = self._decode(data)
+        except (ValueError, RuntimeError):
+            self._remove(path)
+            return None
+
+        # Reading an entry makes it the most recently used one
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return shapes
+
+    def put(self, key: str, shapes: List[Optional[cq.Shape]]):
+        data = self._encode(shapes)
+        fd, tmp = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(key))
+        self._evict()
+
+    def size(self) -> int:
+        return sum(os.path.getsize(p) for p in self._entries())
+
+    def clear(self):
+        for path in self._entries():
+            self._remove(path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, key + ".qsc")
+
+    def _entries(self) -> List[str]:
+        return [os.path.join(self._directory, f) for f in os.listdir(self._directory) if f.endswith(".qsc")]
+
+    def _evict(self):
+        entries = []
+        for path in self._entries():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(e[1] for e in entries)
+        for _, size, path in sorted(entries):
+            if total <= self._maxBytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _encode(shapes: List[Optional[cq.Shape]]) -> bytes:
+        return pack([None if s is None else shape_to_brep(s) for s in shapes])
+
+    @staticmethod
+    def _decode(data: bytes) -> List[Optional[cq.Shape]]:
+        return [None if b is None else shape_from_brep(b) for b in unpack(data)]
+
+
+class MemoryCache(object):
+    _maxEntries: int = 256
+
+    def __init__(self, max_entries: int = None):
+        if max_entries is not None:
+            self._maxEntries = max_entries
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __deepcopy__(self, memo):
+        # Cloned builders share one cache instead of copying every solid
+        return self
+
+    def __getstate__(self):
+        # Cached solids belong to this process, a pickled copy starts empty
+        state = self.__dict__.copy()
+        state["_entries"] = OrderedDict()
+        return state
+
+    def __contains__(self, key: str):
+        return key in self._entries
+
+    def get_max_entries(self) -> int:
+        return self._maxEntries
+
+    def get(self, key: str) -> Optional[List[Optional[cq.Shape]]]:
+        shapes = self._entries.get(key)
+        if shapes is not None:
+            self._entries.move_to_end(key)
+        return shapes
+
+    def put(self, key: str, shapes: List[Optional[cq.Shape]]):
+        self._entries[key] = list(shapes)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxEntries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+def cached_shape(key: str, build: Callable[[], cq.Shape], memory: MemoryCache, disk: BuildCache = None) -> cq.Shape:
+    shapes = memory.get(key)
+    if shapes is None and disk is not None:
+        shapes = disk.get(key)
+        if shapes is not None:
+            memory.put(key, shapes)
+    if shapes is not None:
+        return shapes[0]
+
+    shape = build()
+    memory.put(key, [shape])
+    if disk is not None:
+        disk.put(key, [shape])
+    return shape
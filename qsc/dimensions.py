@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from qsc.constants import Constants
+from qsc.types import Real
+
+# Row -> (extra height, extra top thickness) applied by QSC.row
+ROW_ADJUSTMENTS: Dict[int, Tuple[Real, Real]] = {
+    1: (5, 3),
+    2: (1.5, 0.5),
+    3: (0, 0),
+    4: (2, 1),
+}
+
+# Row -> extra height QSC.homing adds for a scooped dish
+SCOOPED_HEIGHT: Dict[int, Real] = {
+    1: 0.6035380213915218,
+    2: 0.3804040372053077,
+    3: 0.2755496042382024,
+    4: 0.0490026944352374,
+}
+
+# Distance of stabilizer stems from the center, (from width in u, distance in mm)
+STABS: List[Tuple[Real, Real]] = [(6, 50), (2, 12)]
+
+Position = Tuple[Real, Real, Real]
+
+
+def stab_distance(size_u: Real) -> Real:
+    for from_u, distance in STABS:
+        if size_u >= from_u:
+            return distance
+    return 0
+
+
+def stem_positions(width_u: Real, length_u: Real, offset: Position = (0, 0, 0), stabs: bool = True,
+                   special: Iterable[Position] = None) -> List[Position]:
+    positions = [tuple(offset)]
+    if special is not None:
+        return [*positions, *(tuple(p) for p in special)]
+    if stabs:
+        x = stab_distance(width_u)
+        if x:
+            positions.append((-x, 0, 0))
+            positions.append((x, 0, 0))
+        y = stab_distance(length_u)
+        if y:
+            positions.append((0, -y, 0))
+            positions.append((0, y, 0))
+    return positions
+
+
+def raised_offset(position: Tuple[Real, Real], width: Real, length: Real, raised_width: Real, raised_length: Real) -> Tuple[Real, Real]:
+    # Center of the raised part of a stepped cap, which is also where its stem goes
+    return position[0] * (width - raised_width) / 2, position[1] * (length - raised_length) / 2
+
+
+class Dimensions(object):
+    def __init__(self, width: Real, length: Real, height: Real, top_width: Real, top_length: Real, top_thickness: Real, dish_depth: Real,
+                 raised: Optional[Tuple[Real, Real, Real, Real]], stems: List[Position], iso_enter: bool):
+        self.width = width
+        self.length = length
+        self.height = height
+        self.top_width = top_width
+        self.top_length = top_length
+        self.top_thickness = top_thickness
+        self.dish_depth = dish_depth
+        self.raised = raised
+        self.stems = stems
+        self.iso_enter = iso_enter
+
+    def __repr__(self):
+        return f'Dimensions({self.to_dict()})'
+
+    def to_dict(self) -> Dict:
+        return {
+            "width": self.width,
+            "length": self.length,
+            "height": self.height,
+            "top_width": self.top_width,
+            "top_length": self.top_length,
+            "top_thickness": self.top_thickness,
+            "dish_depth": self.dish_depth,
+            "raised": self.raised,
+            "stems": self.stems,
+            "iso_enter": self.iso_enter,
+        }
+
+
+def mm(value) -> Real:
+    # A spec size such as ("u", 2) or ("mm", 30) in millimetres
+    unit, amount = value
+    return amount * Constants.U_IN_MM if unit == "u" else amount
+
+
+def _u(value) -> Real:
+    unit, amount = value
+    return amount if unit == "u" else amount / Constants.U_IN_MM
+
+
+def dimensions(spec) -> Dimensions:
+    # Takes a QSCSpec, or anything with a spec(), and never touches cadquery
+    spec = spec.spec() if hasattr(spec, "spec") and callable(spec.spec) else spec
+    width, length = mm(spec.width), mm(spec.length)
+    stem = dict(spec.stem[1])
+    raised = None
+    if spec.raised_position is not None:
+        x, y = raised_offset(spec.raised_position, width, length, spec.raised_width, spec.raised_length)
+        raised = (x, y, spec.raised_width, spec.raised_length)
+    return Dimensions(
+        width=width,
+        length=length,
+        height=spec.height,
+        top_width=width + spec.top_diff,
+        top_length=length + spec.top_diff,
+        top_thickness=spec.top_thickness,
+        dish_depth=spec.dish_thickness * (1.5 if spec.homing == "SCOOPED" else 1.0),
+        raised=raised,
+        stems=stem_positions(_u(spec.width), _u(spec.length), stem["_offset"], spec.stabs, spec.special_stab_placement),
+        iso_enter=spec.iso_enter,
+    )
+
+
+def envelopes(rows: Sequence[int], widths: Sequence[Real], lengths: Sequence[Real] = None, scooped: Sequence[bool] = None,
+              height: Real = 8, top_thickness: Real = 4, top_diff: Real = -7, dish_thickness: Real = 1.8) -> Dict:
+    # Same numbers as dimensions(), for whole layouts at once. Sizes are in u,
+    # the settings are the QSC defaults before row and homing adjustments.
+    import numpy as np
+
+    rows = np.asarray(rows, dtype=int)
+    widths = np.asarray(widths, dtype=float)
+    lengths = np.ones_like(widths) if lengths is None else np.asarray(lengths, dtype=float)
+    scooped = np.zeros(rows.shape, dtype=bool) if scooped is None else np.asarray(scooped, dtype=bool)
+
+    row_index = np.arange(max(ROW_ADJUSTMENTS) + 1)
+    row_height = np.zeros(row_index.shape)
+    row_top = np.zeros(row_index.shape)
+    scoop = np.zeros(row_index.shape)
+    for row, (h, t) in ROW_ADJUSTMENTS.items():
+        row_height[row] = h
+        row_top[row] = t
+        scoop[row] = SCOOPED_HEIGHT[row]
+
+    def stabs(size_u):
+        distance = np.zeros(size_u.shape)
+        for from_u, d in reversed(STABS):
+            distance = np.where(size_u >= from_u, d, distance)
+        return distance
+
+    width_mm = widths * Constants.U_IN_MM
+    length_mm = lengths * Constants.U_IN_MM
+    return {
+        "width": width_mm,
+        "length": length_mm,
+        "height": height + row_height[rows] + np.where(scooped, scoop[rows], 0.0),
+        "top_width": width_mm + top_diff,
+        "top_length": length_mm + top_diff,
+        "top_thickness": top_thickness + row_top[rows],
+        "dish_depth": np.where(scooped, dish_thickness * 1.5, dish_thickness),
+        "stab_x": stabs(widths),
+        "stab_y": stabs(lengths),
+    }
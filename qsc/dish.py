@@ -1,5 +1,13 @@
-import cadquery as cq
+from __future__ import annotations
+
+import math
+
+from qsc.lazy import cq
 from typing import TypeVar
+from qsc import __version__
+from qsc.cache import BuildCache, MemoryCache, cached_shape
+from qsc.dish_type import DishType
+from qsc.fingerprint import fingerprint
 from qsc.types import Real
 from qsc.u import U
 from qsc.step_settings import StepSettings
@@ -7,6 +15,19 @@ from qsc.step_type import StepType
 
 T = TypeVar("T", bound="Dish")
 
+# Dish cutters only depend on the footprint and dish settings, so they are
+# shared by every cap built in this process.
+_templates = MemoryCache(64)
+
+# Row -> (extra DD, extraDDinverted, translateY, translateZInverted), the
+# cutter is then rotated by the row angle
+DISH_ROW_ADJUSTMENTS = {
+    1: (2.0, 2.0, -1.0, -4.1),
+    2: (2.0, 2.0, -1.2, -3.1),
+    3: (0.0, 0.0, 0.0, -1.8),
+    4: (0.4, 1.55, 1.2, -3.1),
+}
+
 
 class Dish(object):
     _dishThickness = 1.8
@@ -22,6 +43,8 @@ class Dish(object):
     }
     _topDiff = -7
     _stepSettings = None
+    _cache: BuildCache = None
+    _dishType = DishType.SCALED_SPHERE
 
     def __init__(self):
         pass
@@ -58,6 +81,14 @@ class Dish(object):
         self._stepSettings = step_settings
         return self
 
+    def cache(self, cache: BuildCache) -> T:
+        self._cache = cache
+        return self
+
+    def dish_type(self, dish_type: DishType) -> T:
+        self._dishType = dish_type
+        return self
+
     def dish(self, cap: cq.Workplane) -> cq.Workplane:
         dish = None
         ctbb = cap.faces("<Z").findSolid().BoundingBox()
@@ -65,11 +96,11 @@ class Dish(object):
         y = ctbb.ylen
         location = cap.faces(">Z").findFace().Center()
         if self._stepSettings.get_raised_position() is None:
-            dish = self._create_dish(x, y, self._inverted)
+            dish = self._template(x, y, self._inverted)
         else:
             x = self._stepSettings.get_raised_width()
             y = self._stepSettings.get_raised_length()
-            dish = self._create_dish(x, y, self._inverted)
+            dish = self._template(x, y, self._inverted)
         if self._inverted:
             loc = location.toTuple()
             place_dish = self._dish_height(self._row, loc[2])
@@ -101,35 +132,24 @@ class Dish(object):
                 return cap_height - cap_height / 16
         return cap_height
 
+    def _template(self, x: Real, y: Real, inverted: bool) -> cq.Workplane:
+        # Bounding boxes carry a little float noise, round it away for the key
+        key = fingerprint(__version__, "dish", round(x, 4), round(y, 4), self._row, self._rowAngle.get(self._row), self._dishThickness,
+                          self._extraThick, inverted, self._height, self._topDiff, self._dishType)
+        template = cached_shape(key, lambda: self._create_dish(x, y, inverted).findSolid(), _templates, self._cache)
+        return cq.Workplane("XY").add(template)
+
     def _create_dish(self, x: Real, y: Real, inverted: bool) -> cq.Workplane:
         dd_orig = pow((pow(x, 2) + pow(y, 2)), 0.5) - 1
 
-        row_adjustments = {
-            # (extra DD, extraDDinverted, translateY, translateZInverted, rotation)
-            1: (2.0, 2.0, -1.0, -4.1, self._rowAngle.get(1)),
-            2: (2.0, 2.0, -1.2, -3.1, self._rowAngle.get(2)),
-            3: (0.0, 0.0, 0.0, -1.8, self._rowAngle.get(3)),
-            4: (0.4, 1.55, 1.2, -3.1, self._rowAngle.get(4)),
-        }.get(self._row)
+        row_adjustments = (*DISH_ROW_ADJUSTMENTS.get(self._row), self._rowAngle.get(self._row))
         dd = dd_orig + row_adjustments[0]
         dd = dd + row_adjustments[1] if inverted else dd
-        s_x, s_y = dd / 2 / self._dishThickness, dd / 2 / self._dishThickness
-        s_z = 1.5 if self._extraThick else 1.0
-        scale_matrix = cq.Matrix(
-            [
-                [s_x, 0.0, 0.0, 0.0],
-                [0.0, s_y, 0.0, 0.0],
-                [0.0, 0.0, s_z, 0.0],
-                [0.0, 0.0, 0.0, 1.0],
-            ]
-        )
-        scaled_sphere = (cq.Solid
-                         .makeSphere(self._dishThickness, angleDegrees1=-90)
-                         .transformGeometry(scale_matrix)
-                         )
+        radius = dd / 2
+        depth = self._dishThickness * (1.5 if self._extraThick else 1.0)
 
         if inverted:
-            top = (cq.Workplane().add(scaled_sphere).split(keepTop=True))
+            top = self._bowl(radius, depth, True, dd)
             ylen = top.findSolid().BoundingBox().ylen
             bh = self._height - top.findSolid().BoundingBox().zlen + 0.1
             b = (cq.Solid.makeCone(dd_orig / 2 + abs(self._topDiff) / 2 + 1, ylen / 2, bh)
@@ -142,11 +162,56 @@ class Dish(object):
                     .rotate((0, 0, 0), (1, 0, 0), row_adjustments[4])
                     )
         else:
-            bottom = (cq.Workplane().add(scaled_sphere).split(keepBottom=True))
-            p = (cq.Solid.extrudeLinear(bottom.faces(">Z").val(), cq.Vector(0, 0, dd)))
-            return (cq.Workplane("XY")
-                    .add(bottom)
-                    .union(p)
+            return (self._bowl(radius, depth, False, dd)
                     .translate((0, row_adjustments[2], -1))
                     .rotate((0, 0, 0), (1, 0, 0), row_adjustments[4])
                     )
+
+    def _bowl(self, radius: Real, depth: Real, top: bool, extension: Real) -> cq.Workplane:
+        # Half of a spheroid with the given rim radius and depth. The bottom
+        # half is what gets cut, so it carries a cylinder above the rim.
+        if self._dishType == DishType.SCALED_SPHERE:
+            s_xy = radius / self._dishThickness
+            s_z = depth / self._dishThickness
+            scale_matrix = cq.Matrix(
+                [
+                    [s_xy, 0.0, 0.0, 0.0],
+                    [0.0, s_xy, 0.0, 0.0],
+                    [0.0, 0.0, s_z, 0.0],
+                    [0.0, 0.0, 0.0, 1.0],
+                ]
+            )
+            scaled_sphere = (cq.Solid
+                             .makeSphere(self._dishThickness, angleDegrees1=-90)
+                             .transformGeometry(scale_matrix)
+                             )
+            if top:
+                return cq.Workplane().add(scaled_sphere).split(keepTop=True)
+            bottom = cq.Workplane().add(scaled_sphere).split(keepBottom=True)
+            p = cq.Solid.extrudeLinear(bottom.faces(">Z").val(), cq.Vector(0, 0, extension))
+            return cq.Workplane("XY").add(bottom).union(p)
+
+        # Revolving a profile keeps the surface analytic and needs no boolean at all.
+        # On XZ the workplane y axis is global Z, so the profile is revolved around it.
+        if top:
+            profile = cq.Workplane("XZ").moveTo(0, 0).lineTo(radius, 0)
+            profile = self._arc(profile, radius, depth, True).close()
+        else:
+            profile = cq.Workplane("XZ").moveTo(0, -depth)
+            profile = self._arc(profile, radius, depth, False).lineTo(radius, extension).lineTo(0, extension).close()
+        return profile.revolve(360, (0, 0, 0), (0, 1, 0))
+
+    def _arc(self, profile: cq.Workplane, radius: Real, depth: Real, top: bool) -> cq.Workplane:
+        if self._dishType == DishType.REVOLVED_ELLIPSE:
+            if top:
+                return profile.ellipseArc(radius, depth, angle1=0, angle2=90, startAtCurrent=True)
+            return profile.ellipseArc(radius, depth, angle1=270, angle2=360, startAtCurrent=True)
+
+        # Sphere through the rim and the bottom of the dish
+        sphere = (radius ** 2 + depth ** 2) / (2 * depth)
+        half = math.asin(radius / sphere) / 2
+        if top:
+            middle = (sphere * math.sin(half), depth - sphere + sphere * math.cos(half))
+            return profile.threePointArc(middle, (0, depth))
+        middle = (sphere * math.sin(half), sphere - depth - sphere * math.cos(half))
+        return profile.threePointArc(middle, (radius, 0))
@@ -0,0 +1,10 @@
+from enum import Enum, auto
+
+
+class DishType(Enum):
+    # Sphere scaled into a spheroid, OCCT turns it into a BSpline surface
+    SCALED_SPHERE = auto()
+    # The same spheroid profile as an exact revolved elliptical arc
+    REVOLVED_ELLIPSE = auto()
+    # A true spherical cap with the same rim and depth
+    SPHERICAL = auto()
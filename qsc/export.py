@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import os
+import struct
+import zipfile
+from io import BytesIO
+from html import escape
+from typing import IO, Iterable, Iterator, List, Sequence, Tuple
+
+from qsc.lazy import LazyModule, cq
+from qsc.types import Real
+
+APIHeaderSection = LazyModule("OCP.APIHeaderSection")
+BRep = LazyModule("OCP.BRep")
+BRepMesh = LazyModule("OCP.BRepMesh")
+IMeshTools = LazyModule("OCP.IMeshTools")
+STEPControl = LazyModule("OCP.STEPControl")
+StepBasic = LazyModule("OCP.StepBasic")
+StepRepr = LazyModule("OCP.StepRepr")
+TCollection = LazyModule("OCP.TCollection")
+TopAbs = LazyModule("OCP.TopAbs")
+TopLoc = LazyModule("OCP.TopLoc")
+
+Vertex = Tuple[Real, Real, Real]
+Triangle = Tuple[int, int, int]
+
+# One binary STL triangle: normal, three corners and an unused attribute
+_STL_RECORD = [("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attribute", "<u2")]
+
+# 3MF base materials as (name, sRGB color), a part's first body gets the
+# first one and the bodies after it the next
+MATERIALS = (("Cap", "#FFFFFF"), ("Legend", "#000000"))
+
+# Written in place of the current time so exports are reproducible
+_EPOCH = (1980, 1, 1, 0, 0, 0)
+_STEP_EPOCH = "1980-01-01T00:00:00"
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>
+</Types>
+"""
+
+_RELS = """<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>
+</Relationships>
+"""
+
+
+class Mesh(object):
+    def __init__(self, vertices: Sequence[Vertex], triangles: Sequence[Triangle], name: str = None):
+        self.vertices = vertices
+        self.triangles = triangles
+        self.name = name
+
+    def __len__(self):
+        return len(self.triangles)
+
+
+def tessellate(shape: cq.Shape, tolerance: Real = 0.02, angular_tolerance: Real = 0.02, name: str = None) -> Mesh:
+    vertices, triangles = shape.tessellate(tolerance, angular_tolerance)
+    return Mesh([v.toTuple() for v in vertices], triangles, name)
+
+
+def tessellate_adaptive(shape: cq.Shape, tolerance: Real = 0.02, name: str = None, max_angle: Real = 0.5) -> Mesh:
+    import numpy as np
+
+    vertices, triangles, offset = [], [], 0
+    for mesh in tessellate_faces(shape, tolerance, max_angle):
+        vertices.append(mesh.vertices)
+        triangles.append(mesh.triangles + offset)
+        offset += len(mesh.vertices)
+    if not vertices:
+        return Mesh(np.zeros((0, 3)), np.zeros((0, 3), dtype=int), name)
+    return Mesh(np.concatenate(vertices), np.concatenate(triangles), name)
+
+
+def tessellate_faces(shape: cq.Shape, tolerance: Real = 0.02, max_angle: Real = 0.5) -> Iterator[Mesh]:
+    # The chord error is held at tolerance in mm and the angle between
+    # segments is only capped, so every face is split as finely as its own
+    # curvature needs: flat walls stay a handful of triangles while fillets
+    # and the dish get dense. It all has to be one mesher run, faces meshed in
+    # separate runs split their shared edges differently and leave cracks.
+    shape = shape.copy()
+    parameters = IMeshTools.IMeshTools_Parameters()
+    parameters.Deflection = tolerance
+    parameters.DeflectionInterior = tolerance
+    parameters.Angle = max_angle
+    parameters.AngleInterior = max_angle
+    parameters.Relative = False
+    parameters.InParallel = True
+    BRepMesh.BRepMesh_IncrementalMesh(shape.wrapped, parameters)
+
+    for face in shape.Faces():
+        mesh = _triangulation(face.wrapped)
+        if mesh is not None:
+            yield mesh
+
+
+def _triangulation(face) -> Mesh | None:
+    import numpy as np
+
+    location = TopLoc.TopLoc_Location()
+    poly = BRep.BRep_Tool.Triangulation_s(face, location)
+    if poly is None:
+        return None
+    transform = location.Transformation()
+    nodes = (poly.Node(i).Transformed(transform) for i in range(1, poly.NbNodes() + 1))
+    vertices = np.array([(p.X(), p.Y(), p.Z()) for p in nodes], dtype=float)
+    triangles = np.array([t.Get() for t in poly.Triangles()], dtype=int).reshape(-1, 3) - 1
+    if face.Orientation() == TopAbs.TopAbs_Orientation.TopAbs_REVERSED:
+        triangles = triangles[:, [0, 2, 1]]
+    return Mesh(vertices, triangles)
+
+
+class StlWriter(object):
+    # Binary STL, written a mesh at a time. The triangle count goes in once
+    # the writer is closed, so the stream has to be seekable.
+    def __init__(self, f: IO[bytes]):
+        self._f = f
+        self._start = f.tell()
+        self._count = 0
+        f.write(b"qsc".ljust(80, b"\0"))
+        f.write(struct.pack("<I", 0))
+
+    def add(self, mesh: Mesh):
+        import numpy as np
+
+        v = np.asarray(mesh.vertices, dtype=float).reshape(-1, 3)
+        t = np.asarray(mesh.triangles, dtype=int).reshape(-1, 3)
+        a, b, c = v[t[:, 0]], v[t[:, 1]], v[t[:, 2]]
+        normals = np.cross(b - a, c - a)
+        length = np.linalg.norm(normals, axis=1)[:, None]
+        records = np.zeros(len(t), dtype=_STL_RECORD)
+        records["normal"] = np.divide(normals, length, out=np.zeros_like(normals), where=length > 0)
+        records["vertices"] = np.stack([a, b, c], axis=1)
+        self._f.write(records.tobytes())
+        self._count += len(t)
+
+    def close(self):
+        end = self._f.tell()
+        self._f.seek(self._start + 80)
+        self._f.write(struct.pack("<I", self._count))
+        self._f.seek(end)
+
+    def __enter__(self) -> StlWriter:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def write_stl(path: str, meshes: Iterable[Mesh]) -> str:
+    with open(path, "wb") as f:
+        _write_stl(f, meshes)
+    return path
+
+
+def stl_bytes(meshes: Iterable[Mesh]) -> bytes:
+    stream = BytesIO()
+    _write_stl(stream, meshes)
+    return stream.getvalue()
+
+
+def _write_stl(f: IO[bytes], meshes: Iterable[Mesh]):
+    with StlWriter(f) as writer:
+        for mesh in meshes:
+            writer.add(mesh)
+
+
+class ThreeMFWriter(object):
+    # 3MF written an object at a time into a compressed archive, nothing but
+    # the build items is held until close. A part is its bodies as one object
+    # with a component per body, so the cap and its legend stay aligned and
+    # each keeps its own material. Copies of a part place the same object.
+    def __init__(self, f: str | IO[bytes], materials: Sequence[Tuple[str, str]] = MATERIALS):
+        self._archive = zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED)
+        self._archive.writestr(_zip_entry("[Content_Types].xml"), _CONTENT_TYPES)
+        self._archive.writestr(_zip_entry("_rels/.rels"), _RELS)
+        self._model = self._archive.open(_zip_entry("3D/3dmodel.model"), "w", force_zip64=True)
+        self._materials = len(materials)
+        self._next = 2
+        self._items: List[str] = []
+        bases = "".join(f'<base name={_attribute(name)} displaycolor="{color}"/>' for name, color in materials)
+        self._write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<model unit="millimeter" xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">'
+                    f'<resources><basematerials id="1">{bases}</basematerials>')
+
+    def add_object(self, mesh: Mesh, material: int = 0) -> int:
+        vertices, triangles = weld(mesh.vertices, mesh.triangles)
+        object_id = self._id()
+        self._write(f'<object id="{object_id}" type="model"{_name(mesh.name)} pid="1" pindex="{material}"><mesh><vertices>')
+        for chunk in _chunks(vertices):
+            self._write("".join(f'<vertex x="{x:.6f}" y="{y:.6f}" z="{z:.6f}"/>' for x, y, z in chunk))
+        self._write('</vertices><triangles>')
+        for chunk in _chunks(triangles):
+            self._write("".join(f'<triangle v1="{a}" v2="{b}" v3="{c}"/>' for a, b, c in chunk))
+        self._write('</triangles></mesh></object>')
+        return object_id
+
+    def add_part(self, meshes: Sequence[Mesh]) -> int:
+        # The first body gets the first material, legends and other bodies after it the next ones
+        ids = [self.add_object(mesh, min(i, self._materials - 1)) for i, mesh in enumerate(meshes)]
+        if len(ids) == 1:
+            return ids[0]
+        object_id = self._id()
+        components = "".join(f'<component objectid="{i}"/>' for i in ids)
+        self._write(f'<object id="{object_id}" type="model"{_name(meshes[0].name)}><components>{components}</components></object>')
+        return object_id
+
+    def add_item(self, object_id: int, offset: Vertex = (0, 0, 0)):
+        x, y, z = offset
+        transform = "" if (x, y, z) == (0, 0, 0) else f' transform="1 0 0 0 1 0 0 0 1 {x:.6f} {y:.6f} {z:.6f}"'
+        self._items.append(f'<item objectid="{object_id}"{transform}/>')
+
+    def close(self):
+        self._write(f'</resources><build>{"".join(self._items)}</build></model>\n')
+        self._model.close()
+        self._archive.close()
+
+    def _id(self) -> int:
+        self._next += 1
+        return self._next - 1
+
+    def _write(self, text: str):
+        self._model.write(text.encode("utf-8"))
+
+    def __enter__(self) -> ThreeMFWriter:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def write_3mf(path: str, parts: Iterable[Sequence[Mesh]]) -> str:
+    # Every part is placed where its meshes are, parts can be generated one at a time
+    with ThreeMFWriter(path) as writer:
+        for meshes in parts:
+            writer.add_item(writer.add_part(meshes))
+    return path
+
+
+def weld(vertices: Sequence[Vertex], triangles: Sequence[Triangle]):
+    # Vertices in the same place become one and triangles left without an
+    # area are dropped, tessellated faces each carry their own copy of the
+    # edges they share
+    import numpy as np
+
+    vertices = np.asarray(vertices, dtype=float).reshape(-1, 3)
+    triangles = np.asarray(triangles, dtype=int).reshape(-1, 3)
+    unique, inverse = np.unique(np.round(vertices, 6), axis=0, return_inverse=True)
+    triangles = inverse.reshape(-1)[triangles]
+    keep = (triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & (triangles[:, 0] != triangles[:, 2])
+    return unique, triangles[keep]
+
+
+def _zip_entry(name: str) -> zipfile.ZipInfo:
+    # A fixed date keeps archives of the same meshes byte for byte the same
+    entry = zipfile.ZipInfo(name, date_time=_EPOCH)
+    entry.compress_type = zipfile.ZIP_DEFLATED
+    return entry
+
+
+def _name(name: str | None) -> str:
+    return "" if name is None else f" name={_attribute(name)}"
+
+
+def _attribute(value: str) -> str:
+    # xml.sax.saxutils would pull urllib and http.client into every import of qsc
+    return '"' + escape(value, quote=True).replace("\n", "&#10;").replace("\r", "&#13;").replace("\t", "&#9;") + '"'
+
+
+def _chunks(rows, size: int = 4096):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size].tolist()
+
+
+def write_step(path: str, shapes: List[cq.Shape], name: str = None) -> str:
+    # The header time stamp, the product name and the assembly usage ids,
+    # which the translator numbers per process, are pinned so the same
+    # shapes give the same file
+    shape = shapes[0] if len(shapes) == 1 else cq.Compound.makeCompound(shapes)
+    writer = STEPControl.STEPControl_Writer()
+    writer.Transfer(shape.wrapped, STEPControl.STEPControl_StepModelType.STEPControl_AsIs)
+    model = writer.Model()
+    product = TCollection.TCollection_HAsciiString(name or os.path.splitext(os.path.basename(path))[0])
+    usages = 0
+    for i in range(1, model.NbEntities() + 1):
+        entity = model.Value(i)
+        if isinstance(entity, StepBasic.StepBasic_Product):
+            entity.SetId(product)
+            entity.SetName(product)
+        elif isinstance(entity, StepRepr.StepRepr_NextAssemblyUsageOccurrence):
+            usages += 1
+            entity.SetId(TCollection.TCollection_HAsciiString(str(usages)))
+    APIHeaderSection.APIHeaderSection_MakeHeader(model).SetTimeStamp(TCollection.TCollection_HAsciiString(_STEP_EPOCH))
+    writer.Write(path)
+    return path
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, TypeVar
+
+from qsc import __version__
+from qsc.cache import shape_from_brep, shape_to_brep
+from qsc.fingerprint import canonical, fingerprint
+from qsc.homing_type import HomingType
+from qsc.lazy import LazyModule, cq
+from qsc.qsc import QSC
+from qsc.types import Real
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+T = TypeVar("T", bound="FilletLimits")
+
+Standard = LazyModule("OCP.Standard")
+StdFail = LazyModule("OCP.StdFail")
+
+_SELECTORS = {
+    "top": ">Z",
+    "bottom": "<Z",
+    "step": ">Z[1]",
+}
+
+
+def _probe(brep: bytes, selector: str, radius: Real) -> bool:
+    shape = shape_from_brep(brep)
+    # Only the outside of a shelled cap's bottom ring is rounded, the same as in the build
+    edges = cq.Workplane("XY").add(shape).faces(selector).findFace().outerWire().Edges()
+    try:
+        return shape.fillet(radius, edges).isValid()
+    except (StdFail.StdFail_NotDone, Standard.Standard_Failure):
+        return False
+
+
+class FilletLimits(object):
+    _path: str = None
+    _workers: int = None
+    _tolerance: Real = 0.01
+
+    def __init__(self, path: str = None):
+        self._path = path
+        self._table: Dict[str, Dict] = {}
+        self._pool: Optional[Executor] = None
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                self._table = json.load(f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def workers(self, workers: int) -> T:
+        self.close()
+        self._workers = workers
+        return self
+
+    def tolerance(self, tolerance: Real) -> T:
+        self._tolerance = tolerance
+        return self
+
+    def lookup(self, cap: QSC, which: str) -> Optional[Real]:
+        entry = self._table.get(self._key(cap, which))
+        return None if entry is None else entry["limit"]
+
+    def find(self, cap: QSC, which: str) -> Real:
+        key = self._key(cap, which)
+        entry = self._table.get(key)
+        if entry is not None and entry["bracket"][1] - entry["bracket"][0] <= self._tolerance:
+            return entry["limit"]
+
+        shape = self._shape(cap, which)
+        if entry is not None:
+            bracket = tuple(entry["bracket"])
+        else:
+            bracket = (0.0, 2 * shape.BoundingBox().DiagonalLength)
+
+        lo, hi = self._search(shape, _SELECTORS[which], bracket)
+        self._table[key] = {
+            **self._describe(cap, which),
+            "limit": lo,
+            "bracket": [lo, hi],
+        }
+        self._save()
+        return lo
+
+    def clamp(self, cap: QSC) -> QSC:
+        # Only uses limits that are already known, so it never builds anything
+        clamped = cap.clone()
+        for which, setter in (("top", QSC.top_fillet), ("bottom", QSC.bottom_fillet), ("step", QSC.step_fillet)):
+            if which == "step" and clamped._raisedPosition is None:
+                continue
+            limit = self.lookup(clamped, which)
+            if limit is not None and self._value(clamped, which) > limit:
+                setter(clamped, limit)
+        return clamped
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _probes(self) -> int:
+        return self._workers or os.cpu_count() or 1
+
+    def _executor(self) -> Optional[Executor]:
+        # One pool for every search this instance runs, started on first use
+        if self._probes() < 2:
+            return None
+        if self._pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._pool = ProcessPoolExecutor(max_workers=self._probes())
+        return self._pool
+
+    def _search(self, shape: cq.Shape, selector: str, bracket: Tuple[Real, Real]) -> Tuple[Real, Real]:
+        lo, hi = bracket
+        probes = self._probes()
+        brep = shape_to_brep(shape)
+        executor = self._executor()
+        while hi - lo > self._tolerance:
+            # Every probe is an independent fillet attempt, so a round
+            # narrows the bracket by probes + 1 instead of by 2.
+            radii = [lo + (hi - lo) * (i + 1) / (probes + 1) for i in range(probes)]
+            if executor is None:
+                results = [_probe(brep, selector, r) for r in radii]
+            else:
+                results = list(executor.map(_probe, [brep] * len(radii), [selector] * len(radii), radii))
+            lo, hi = self._narrow(lo, hi, radii, results)
+        return lo, hi
+
+    @staticmethod
+    def _narrow(lo: Real, hi: Real, radii: List[Real], results: List[bool]) -> Tuple[Real, Real]:
+        for radius, ok in zip(radii, results):
+            if not ok:
+                return lo, radius
+            lo = radius
+        return lo, hi
+
+    @staticmethod
+    def _shape(cap: QSC, which: str) -> cq.Shape:
+        # The shape a fillet is applied to, with every earlier fillet in place
+        # and, for a shelled cap, the shell that the build takes before them
+        probe = (cap.clone()
+                 .cache(None)
+                 .stage_cache(None)
+                 .top_fillet(max(cap._topFillet, 0) if which != "top" else 0)
+                 .bottom_fillet(max(cap._bottomFillet, 0) if which == "step" else 0)
+                 .step_fillet(0)
+                 )
+        dished = probe._dish(probe._base())[0]
+        return probe._fillet(probe._shell(dished) if probe._shell_first() else dished).findSolid()
+
+    @staticmethod
+    def _value(cap: QSC, which: str) -> Real:
+        return {
+            "top": cap._topFillet,
+            "bottom": cap._bottomFillet,
+            "step": cap._stepFillet,
+        }.get(which)
+
+    @staticmethod
+    def _describe(cap: QSC, which: str) -> Dict:
+        return {
+            "which": which,
+            "row": cap._row,
+            "width": cap._width.u().get(),
+            "length": cap._length.u().get(),
+            "step": None if cap._raisedPosition is None else canonical((cap._raisedPosition, cap._raisedWidth, cap._raisedLength, cap._stepHeight)),
+            "inverted": cap._inverted,
+            "iso_enter": cap._isoEnter,
+            "dish_type": cap._dishType.name,
+            "hollow_type": cap._hollowType.name,
+            "row_angle": cap._rowAngle.get(cap._row),
+        }
+
+    def _key(self, cap: QSC, which: str) -> str:
+        if which not in _SELECTORS:
+            raise ValueError("Unknown fillet", which)
+        upstream = {
+            "top": (),
+            "bottom": (max(cap._topFillet, 0),),
+            "step": (max(cap._topFillet, 0), max(cap._bottomFillet, 0)),
+        }.get(which)
+        # A shell is the only way the inside changes what gets filleted
+        wall = cap._wallThickness if cap._shell_first() else None
+        return fingerprint(__version__, self._describe(cap, which), cap._height, cap._topDiff, cap._dishThickness, cap._topRectFillet,
+                           cap._bottomRectFillet, cap._homingType == HomingType.SCOOPED, wall, upstream)
+
+    def _save(self):
+        if self._path is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self._path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self._table, f, indent=2, sort_keys=True)
+        os.replace(tmp, self._path)
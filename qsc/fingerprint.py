@@ -0,0 +1,47 @@
+import hashlib
+import json
+from enum import Enum
+from typing import Any, Dict, Iterable
+
+
+def state(obj: Any, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+    # Settings objects keep their defaults as class attributes and only store
+    # overrides on the instance, so both have to be walked.
+    values = {}
+    for cls in reversed(type(obj).__mro__):
+        for name, value in vars(cls).items():
+            if _is_setting(name, value):
+                values[name] = value
+    values.update({k: v for k, v in getattr(obj, "__dict__", {}).items() if _is_setting(k, v)})
+    for name in exclude:
+        values.pop(name, None)
+    return values
+
+
+def canonical(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, Enum):
+        return {"enum": type(value).__name__, "name": value.name}
+    if isinstance(value, (int, float)):
+        return round(float(value), 9) + 0.0
+    if isinstance(value, dict):
+        items = [[canonical(k), canonical(v)] for k, v in value.items()]
+        return {"dict": sorted(items, key=lambda kv: json.dumps(kv[0], sort_keys=True))}
+    if isinstance(value, (list, tuple)):
+        return [canonical(v) for v in value]
+    return {
+        "type": type(value).__name__,
+        "state": {k: canonical(v) for k, v in sorted(state(value).items())},
+    }
+
+
+def fingerprint(*values: Any) -> str:
+    payload = json.dumps(canonical(values), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _is_setting(name: str, value: Any) -> bool:
+    if not name.startswith("_") or name.startswith("__") or name.startswith("_abc"):
+        return False
+    return not (callable(value) or isinstance(value, (staticmethod, classmethod, property)))
@@ -0,0 +1,10 @@
+from enum import Enum, auto
+
+
+class HollowType(Enum):
+    # Loft a smaller base and cut it out
+    LOFT = auto()
+    # Offset the dished outside inwards before the fillets, roof and walls end
+    # up exactly wall thickness. Needs an analytic dish and round corners, and
+    # does not work on stepped or ISO enter caps. Supports are always ray cast.
+    SHELL = auto()
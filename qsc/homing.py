@@ -1,4 +1,6 @@
-from cadquery import Workplane, BoundBox
+from __future__ import annotations
+
+from qsc.lazy import cq
 from qsc.homing_type import HomingType
 
 
@@ -8,14 +10,14 @@ class Homing(object):
     def __init__(self, variant: HomingType):
         self._variant = variant
 
-    def add(self, cap: Workplane) -> Workplane:
+    def add(self, cap: cq.Workplane) -> cq.Workplane:
         if self._variant is None or self._variant == HomingType.SCOOPED:
             return cap
 
         capBB = cap.findSolid().BoundingBox()
 
         length = capBB.ylen / 2 if self._variant == HomingType.BAR else 1
-        placer = (Workplane()
+        placer = (cq.Workplane()
                   .sketch()
                   .rect(0.1, length)
                   .finalize()
@@ -31,9 +33,9 @@ class Homing(object):
 
         return cap
 
-    def _bar(self, cap: Workplane, bb: BoundBox) -> Workplane:
+    def _bar(self, cap: cq.Workplane, bb: cq.BoundBox) -> cq.Workplane:
         bar_size = 1
-        bar = (Workplane("XY")
+        bar = (cq.Workplane("XY")
                .sketch()
                .rect(cap.findSolid().BoundingBox().xlen / 3, bar_size)
                .vertices()
@@ -46,9 +48,9 @@ class Homing(object):
         b = bar.translate((0, bb.ymin, bb.zlen - bar_size / 1.5))
         return cap.union(b)
 
-    def _dot(self, cap: Workplane, bb: BoundBox) -> Workplane:
+    def _dot(self, cap: cq.Workplane, bb: cq.BoundBox) -> cq.Workplane:
         dot_size = 1
-        dot = (Workplane()
+        dot = (cq.Workplane()
                .sphere(dot_size)
                .translate((0, bb.ymin, bb.zlen - dot_size / 2))
                )
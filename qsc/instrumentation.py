@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Callable, Dict, IO, List, Optional
+
+from qsc.lazy import cq
+from qsc.types import Real
+
+_BOOLEANS = ("cut", "fuse", "intersect", "split")
+_FILLETS = ("fillet", "chamfer")
+
+_local = threading.local()
+_listeners: List[Callable[["BuildEvent"], None]] = []
+_lock = threading.Lock()
+
+
+def _counts() -> Dict[str, int]:
+    if not hasattr(_local, "counts"):
+        _local.counts = {"boolean": 0, "fillet": 0}
+    return _local.counts
+
+
+def _counting(method, kind: str):
+    def wrapper(*args, **kwargs):
+        # Overrides that reach another counted method are one operation
+        depth = getattr(_local, "depth", 0)
+        if depth == 0:
+            _counts()[kind] += 1
+        _local.depth = depth + 1
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _local.depth = depth
+
+    wrapper.__wrapped__ = method
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+def _classes(cls) -> List[type]:
+    # The class, every subclass and every mixin they are made of
+    classes, pending = [], [cls]
+    while pending:
+        c = pending.pop()
+        for m in c.__mro__:
+            if m is not object and m not in classes:
+                classes.append(m)
+        pending.extend(c.__subclasses__())
+    return classes
+
+
+def _install(cadquery):
+    # Compound overrides the booleans it inherits from Shape and a found solid
+    # is often a Compound, so every class that defines an operation is patched.
+    # Fillets are only counted on 3D shapes, a Wire fillet is a 2D operation.
+    for classes, names, kind in ((_classes(cadquery.Shape), _BOOLEANS, "boolean"),
+                                 ([*cadquery.Solid.__mro__, *cadquery.Compound.__mro__], _FILLETS, "fillet")):
+        for owner in dict.fromkeys(classes):
+            for name in names:
+                method = vars(owner).get(name)
+                if method is not None and not hasattr(method, "__wrapped__"):
+                    setattr(owner, name, _counting(method, kind))
+
+
+cq.on_load(_install)
+
+
+class BuildEvent(object):
+    def __init__(self, stage: str, cap: str, wall: Real, cpu: Real, booleans: int, fillets: int, faces: Optional[int], edges: Optional[int],
+                 cached: bool):
+        self.stage = stage
+        self.cap = cap
+        self.wall = wall
+        self.cpu = cpu
+        self.booleans = booleans
+        self.fillets = fillets
+        self.faces = faces
+        self.edges = edges
+        self.cached = cached
+
+    def __repr__(self):
+        return f'BuildEvent({self.to_dict()})'
+
+    def to_dict(self) -> Dict:
+        return {
+            "stage": self.stage,
+            "cap": self.cap,
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "booleans": self.booleans,
+            "fillets": self.fillets,
+            "faces": self.faces,
+            "edges": self.edges,
+            "cached": self.cached,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+
+class BuildRecorder(object):
+    def __init__(self):
+        self.events: List[BuildEvent] = []
+
+    def __call__(self, event: BuildEvent):
+        self.events.append(event)
+
+    def __enter__(self) -> BuildRecorder:
+        with _lock:
+            _listeners.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        with _lock:
+            _listeners.remove(self)
+        return False
+
+    def write_jsonl(self, out: str | IO[str]):
+        if isinstance(out, str):
+            with open(out, "a") as f:
+                self.write_jsonl(f)
+            return
+        for event in self.events:
+            out.write(event.to_json() + "\n")
+
+
+def listeners(extra=()) -> List[Callable[[BuildEvent], None]]:
+    with _lock:
+        return [*extra, *_listeners]
+
+
+def measure(stage: str, cap: str, run: Callable, hooks: List[Callable[[BuildEvent], None]]):
+    counts = _counts()
+    booleans, fillets = counts["boolean"], counts["fillet"]
+    wall, cpu = time.perf_counter(), time.process_time()
+
+    result, cached = run()
+
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    shape = _first_shape(result)
+    event = BuildEvent(
+        stage,
+        cap,
+        wall,
+        cpu,
+        counts["boolean"] - booleans,
+        counts["fillet"] - fillets,
+        None if shape is None else len(shape.Faces()),
+        None if shape is None else len(shape.Edges()),
+        cached,
+    )
+    for hook in hooks:
+        hook(event)
+    return result
+
+
+def _first_shape(result) -> Optional[cq.Shape]:
+    wp = result[0] if isinstance(result, tuple) else result
+    return None if wp is None else wp.findSolid()
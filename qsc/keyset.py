@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from qsc.cache import BuildCache, shape_from_brep, shape_to_brep
+from qsc.dish_type import DishType
+from qsc.hollow_type import HollowType
+from qsc.homing_type import HomingType
+from qsc.lazy import cq
+from qsc.manifest import Manifest
+from qsc.mm import MM
+from qsc.qsc import QSC
+from qsc.quality import Quality
+from qsc.spec import QSCSpec
+from qsc.step_type import StepType
+from qsc.u import U
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+T = TypeVar("T", bound="Keyset")
+
+# Keyboard rows counted from the bottom of the layout: space row, shift row, home row ...
+_ROWS_FROM_BOTTOM = [4, 4, 3, 2, 1]
+
+# Builder calls that depend on other settings have to run after them
+_SPEC_ORDER = [
+    "width",
+    "length",
+    "iso_enter",
+    "row",
+    "homing",
+    "stepped",
+    "inverted",
+    "wall_thickness",
+    "hollow_type",
+    "top_thickness",
+    "dish_thickness",
+    "dish_type",
+    "top_diff",
+    "top_fillet",
+    "bottom_fillet",
+    "step_fillet",
+    "top_rect_fillet",
+    "bottom_rect_fillet",
+    "disable_stabs",
+    "legend",
+    "quality",
+]
+
+
+def qsc_from_dict(spec: Dict) -> QSC:
+    unknown = set(spec.keys()) - set(_SPEC_ORDER) - {"font", "font_size"}
+    if unknown:
+        raise ValueError("Unknown QSC spec keys", sorted(unknown))
+
+    cap = QSC()
+    for name in _SPEC_ORDER:
+        if name not in spec or spec[name] is None:
+            continue
+        value = spec[name]
+        if name in ("width", "length"):
+            getattr(cap, name)(_size(value))
+        elif name == "iso_enter":
+            cap.iso_enter(bool(value))
+        elif name == "homing":
+            cap.homing(HomingType[value.upper()] if isinstance(value, str) else value)
+        elif name == "stepped":
+            if value is True:
+                cap.stepped()
+            elif value:
+                cap.stepped(StepType[value.upper()] if isinstance(value, str) else value)
+        elif name == "dish_type":
+            cap.dish_type(DishType[value.upper()] if isinstance(value, str) else value)
+        elif name == "hollow_type":
+            cap.hollow_type(HollowType[value.upper()] if isinstance(value, str) else value)
+        elif name == "quality":
+            cap.quality(Quality[value.upper()] if isinstance(value, str) else value)
+        elif name == "inverted":
+            cap.inverted(bool(value))
+        elif name == "disable_stabs":
+            cap.disable_stabs(bool(value))
+        elif name == "legend":
+            cap.legend(value, font_size=spec.get("font_size", -1), font=spec.get("font", "Arial"))
+        else:
+            getattr(cap, name)(value)
+    return cap
+
+
+def _size(value) -> U | MM:
+    if isinstance(value, (U, MM)):
+        return value
+    if isinstance(value, dict) and "mm" in value:
+        return MM(value["mm"])
+    return U(value)
+
+
+def _export(spec: QSCSpec, cache: BuildCache, directory: str, formats: List[str], tolerance, angularTolerance, adaptive: bool) -> List[str]:
+    return QSC.from_spec(spec).cache(cache).export(directory, formats, tolerance, angularTolerance, adaptive)
+
+
+def build_brep(spec: QSCSpec, cache: BuildCache = None) -> Tuple[bytes, Optional[bytes]]:
+    c, legend = QSC.from_spec(spec).cache(cache).build()
+    return (
+        shape_to_brep(c.findSolid()),
+        None if legend is None else shape_to_brep(legend.findSolid())
+    )
+
+
+class Keyset(object):
+    _cache: BuildCache = None
+    _workers: int = None
+    _quality: Quality = None
+
+    def __init__(self, caps: Iterable[QSC | Dict] = ()):
+        self._keys: List[Tuple[Optional[float], Optional[float], QSC]] = []
+        for cap in caps:
+            self.add(cap)
+
+    @staticmethod
+    def from_kle(layout: str | List, legends: bool = True) -> Keyset:
+        if isinstance(layout, str):
+            if os.path.exists(layout):
+                with open(layout) as f:
+                    layout = json.load(f)
+            else:
+                layout = json.loads(layout)
+
+        rows = [r for r in layout if isinstance(r, list)]
+        keyset = Keyset()
+        y = 0.0
+        for index, row in enumerate(rows):
+            from_bottom = len(rows) - 1 - index
+            profile_row = _ROWS_FROM_BOTTOM[min(from_bottom, len(_ROWS_FROM_BOTTOM) - 1)]
+            x = 0.0
+            props = {}
+            for item in row:
+                if isinstance(item, dict):
+                    x += item.get("x", 0)
+                    y += item.get("y", 0)
+                    if "p" in item:
+                        profile = re.search(r"R(\d)", str(item["p"]))
+                        if profile is not None:
+                            profile_row = min(max(int(profile.group(1)), 1), 4)
+                    props.update(item)
+                    continue
+
+                w = props.get("w", 1)
+                h = props.get("h", 1)
+                spec = {"row": profile_row}
+                if h >= 2 and props.get("w2", w) == 1.5:
+                    spec["iso_enter"] = True
+                else:
+                    spec["width"] = w
+                    spec["length"] = h
+                label = next((line.strip() for line in str(item).split("\n") if line.strip()), None)
+                if legends and label is not None:
+                    spec["legend"] = label
+
+                keyset.add(qsc_from_dict(spec), x, y)
+                x += w
+                props = {}
+            y += 1
+        return keyset
+
+    def add(self, cap: QSC | Dict, x: float = None, y: float = None) -> T:
+        self._keys.append((x, y, qsc_from_dict(cap) if isinstance(cap, dict) else cap))
+        return self
+
+    def cache(self, cache: BuildCache) -> T:
+        self._cache = cache
+        return self
+
+    def workers(self, workers: int) -> T:
+        self._workers = workers
+        return self
+
+    def quality(self, quality: Quality) -> T:
+        self._quality = quality
+        return self
+
+    def keys(self) -> List[Tuple[Optional[float], Optional[float], QSC]]:
+        return list(self._keys)
+
+    def unique(self) -> Dict[QSCSpec, QSC]:
+        unique = {}
+        for _, _, cap in self._keys:
+            unique.setdefault(cap.spec(), cap)
+        return unique
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # Spawned, a forked worker would inherit whatever OCCT state and threads this process has
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(max_workers=self._workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def build(self) -> List[Tuple[QSC, Tuple[cq.Workplane, Optional[cq.Workplane]]]]:
+        unique = self.unique()
+        if self._quality is not None:
+            unique = {spec: cap.clone().quality(self._quality) for spec, cap in unique.items()}
+
+        built = {}
+        if self._workers == 1 or len(unique) <= 1:
+            for spec, cap in unique.items():
+                built[spec] = (cap if self._cache is None else cap.clone().cache(self._cache)).build()
+        else:
+            with self._executor() as executor:
+                futures = {spec: executor.submit(build_brep, cap.spec(), self._cache) for spec, cap in unique.items()}
+                for key, future in futures.items():
+                    c, legend = future.result()
+                    built[key] = (
+                        cq.Workplane("XY").add(shape_from_brep(c)),
+                        None if legend is None else cq.Workplane("XY").add(shape_from_brep(legend)),
+                    )
+
+        return [(cap, built[cap.spec()]) for _, _, cap in self._keys]
+
+    def export(self, directory: str = ".", formats: Iterable[str] = ("stl",), tolerance=None, angularTolerance=None,
+               adaptive: bool = False) -> List[str]:
+        # Only caps the manifest in directory can not vouch for are built and written
+        formats = [f.lower() for f in formats]
+        manifest = Manifest(directory)
+        paths = []
+        stale = []
+        for cap in self.unique().values():
+            cap = cap if self._quality is None else cap.clone().quality(self._quality)
+            current = manifest.current(cap, formats, tolerance, angularTolerance, adaptive)
+            if current is None:
+                stale.append(cap)
+            else:
+                paths.extend(current)
+
+        try:
+            if self._workers == 1 or len(stale) <= 1:
+                for cap in stale:
+                    written = (cap if self._cache is None else cap.clone().cache(self._cache)).export(directory, formats, tolerance, angularTolerance, adaptive)
+                    manifest.record(cap, written, tolerance, angularTolerance, adaptive)
+                    paths.extend(written)
+            else:
+                with self._executor() as executor:
+                    futures = [(cap, executor.submit(_export, cap.spec(), self._cache, directory, formats, tolerance, angularTolerance, adaptive)) for cap in stale]
+                    for cap, future in futures:
+                        written = future.result()
+                        manifest.record(cap, written, tolerance, angularTolerance, adaptive)
+                        paths.extend(written)
+        finally:
+            # Whatever got written before a failure is kept for the next run
+            manifest.save()
+        return paths
@@ -0,0 +1,42 @@
+import importlib
+import threading
+from types import ModuleType
+from typing import Callable, List
+
+
+class LazyModule(object):
+    def __init__(self, name: str):
+        self._name = name
+        self._module: ModuleType = None
+        self._hooks: List[Callable[[ModuleType], None]] = []
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return f'LazyModule(name={self._name!r}, loaded={self._module is not None})'
+
+    def on_load(self, hook: Callable[[ModuleType], None]):
+        with self._lock:
+            if self._module is None:
+                self._hooks.append(hook)
+                return
+        hook(self._module)
+
+    def load(self) -> ModuleType:
+        with self._lock:
+            if self._module is None:
+                module = importlib.import_module(self._name)
+                self._module = module
+                for hook in self._hooks:
+                    hook(module)
+                self._hooks = []
+        return self._module
+
+    def __getattr__(self, attr: str):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self.load(), attr)
+
+
+# cadquery pulls in OCP and takes seconds to import, everything geometric goes
+# through this handle so it is only loaded once a build actually needs it.
+cq = LazyModule("cadquery")
@@ -1,6 +1,14 @@
-import cadquery as cq
+from __future__ import annotations
+
+from qsc.lazy import cq
+from qsc.cache import MemoryCache, cached_shape
+from qsc.fingerprint import fingerprint
 from qsc.legend.legend_settings import LegendSettings
 
+# Text solids are built at the origin and placed per cap, so a legend is
+# only tessellated once per text, font, size and alignment.
+_glyphs = MemoryCache(512)
+
 
 class Legend(object):
     _settings: LegendSettings = None
@@ -15,23 +23,29 @@ class Legend(object):
                      .workplane(offset=-self._settings.get_distance(), centerOption="CenterOfMass")
                      .center(self._settings.get_x_pos(), self._settings.get_y_pos())
                      )
-        nc = cq.Workplane().add(cap).copyWorkplane(placement)
-        nw = cq.Workplane().copyWorkplane(nc)
-        c = nc.text(txt=self._settings.get_legend(),
-                    fontsize=self._settings.get_font_size(),
-                    distance=self._settings.get_distance(),
-                    font=self._settings.get_font(),
-                    halign=self._settings.get_h_align(),
-                    valign=self._settings.get_v_align(),
-                    combine="cut"
-                    )
-        t = nw.text(txt=self._settings.get_legend(),
-                    fontsize=self._settings.get_font_size(),
-                    distance=self._settings.get_distance(),
-                    font=self._settings.get_font_or_path(),
-                    halign=self._settings.get_h_align(),
-                    valign=self._settings.get_v_align(),
-                    combine='a',
-                    cut=False
-                    )
+        glyph = self._glyph().moved(placement.plane.location)
+        c = cq.Workplane("XY").add(cap.findSolid().cut(glyph))
+        t = cq.Workplane("XY").add(glyph)
         return c, t
+
+    def _glyph(self) -> cq.Shape:
+        settings = self._settings
+        key = fingerprint(
+            "glyph",
+            settings.get_legend(),
+            settings.get_font(),
+            settings.get_font_path(),
+            settings.get_font_size(),
+            settings.get_distance(),
+            settings.get_h_align(),
+            settings.get_v_align(),
+        )
+        return cached_shape(key, lambda: cq.Compound.makeText(
+            settings.get_legend(),
+            settings.get_font_size(),
+            settings.get_distance(),
+            font=settings.get_font(),
+            fontPath=settings.get_font_path(),
+            halign=settings.get_h_align(),
+            valign=settings.get_v_align(),
+        ), _glyphs)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+from qsc import __version__
+from qsc.qsc import QSC
+from qsc.types import Real
+
+# Manifests written in another layout are ignored and everything is exported again
+_FORMAT = 1
+
+
+class Manifest(object):
+    # What every exported file in a directory was made from: the spec digest,
+    # the library version and the export settings, next to a hash of the file
+    # as it was written. A cap whose files are all still there, unchanged and
+    # made from the same inputs, does not have to be built again.
+    FILE = "manifest.json"
+
+    def __init__(self, directory: str = "."):
+        self._directory = directory
+        self._files: Dict[str, Dict] = {}
+        if os.path.exists(self.path()):
+            with open(self.path()) as f:
+                data = json.load(f)
+            if data.get("format") == _FORMAT:
+                self._files = data["files"]
+
+    def path(self) -> str:
+        return os.path.join(self._directory, self.FILE)
+
+    def files(self) -> Dict[str, Dict]:
+        return dict(self._files)
+
+    def current(self, cap: QSC, formats: Iterable[str] = ("stl",), tolerance: Real = None, angularTolerance: Real = None,
+                adaptive: bool = False) -> Optional[List[str]]:
+        # The paths cap.export would write, or None when any of them has to be written again
+        formats = [f.lower() for f in formats]
+        inputs = _inputs(cap, tolerance, angularTolerance, adaptive)
+        names = [name for name, entry in self._files.items() if {k: v for k, v in entry.items() if k != "sha256"} == inputs]
+        if not set(formats) <= {_format(name) for name in names}:
+            return None
+        for name in names:
+            path = os.path.join(self._directory, name)
+            if not os.path.exists(path) or _sha256(path) != self._files[name]["sha256"]:
+                return None
+        names = sorted((name for name in names if _format(name) in formats), key=lambda name: (formats.index(_format(name)), name))
+        return [os.path.join(self._directory, name) for name in names]
+
+    def record(self, cap: QSC, paths: Iterable[str], tolerance: Real = None, angularTolerance: Real = None, adaptive: bool = False):
+        inputs = _inputs(cap, tolerance, angularTolerance, adaptive)
+        for path in paths:
+            self._files[os.path.basename(path)] = dict(inputs, sha256=_sha256(path))
+
+    def export(self, cap: QSC, formats: Iterable[str] = ("stl",), tolerance: Real = None, angularTolerance: Real = None,
+               adaptive: bool = False) -> List[str]:
+        paths = self.current(cap, formats, tolerance, angularTolerance, adaptive)
+        if paths is None:
+            paths = cap.export(self._directory, formats, tolerance, angularTolerance, adaptive)
+            self.record(cap, paths, tolerance, angularTolerance, adaptive)
+        return paths
+
+    def prune(self) -> List[str]:
+        # Forgets files that were deleted since they were recorded
+        gone = [name for name in self._files if not os.path.exists(os.path.join(self._directory, name))]
+        for name in gone:
+            del self._files[name]
+        return gone
+
+    def save(self) -> str:
+        # Sorted and written in one go, a manifest is as reproducible as the files it lists
+        self.prune()
+        path = self.path()
+        with open(path + ".tmp", "w") as f:
+            json.dump({"format": _FORMAT, "files": self._files}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(path + ".tmp", path)
+        return path
+
+
+def _inputs(cap: QSC, tolerance: Real, angularTolerance: Real, adaptive: bool) -> Dict:
+    return {
+        "spec": cap.spec().digest(),
+        "version": str(__version__),
+        "tolerance": cap._quality.value[0] if tolerance is None else tolerance,
+        "angular_tolerance": cap._quality.value[1] if angularTolerance is None else angularTolerance,
+        "adaptive": adaptive,
+    }
+
+
+def _format(name: str) -> str:
+    return os.path.splitext(name)[1][1:].lower()
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import math
+from typing import List, Tuple
+
+from qsc.dimensions import mm
+from qsc.dish import DISH_ROW_ADJUSTMENTS
+from qsc.export import Mesh, weld
+from qsc.types import Real
+
+# Corner arcs and top rings are sampled this finely no matter the resolution
+_MIN_ARC_SEGMENTS = 4
+_MIN_TOP_RINGS = 4
+
+
+def cap_mesh(cap, resolution: Real = 1.0, name: str = None) -> Mesh:
+    # A preview of the built cap as a watertight triangle mesh straight from
+    # the spec: the outside loft, the dish and the lofted inside. Fillets,
+    # homing bumps, stems and legends are left out, and a shelled cap gets
+    # the lofted inside as well.
+    import numpy as np
+
+    spec = cap.spec() if hasattr(cap, "spec") and callable(cap.spec) else cap
+    if spec.raised_position is not None or spec.iso_enter or spec.inverted:
+        raise ValueError("Mesh previews only handle plain caps, not stepped, iso enter or inverted ones")
+
+    width, length, height = mm(spec.width), mm(spec.length), spec.height
+    diff = spec.top_diff
+    inner_height = height - spec.top_thickness
+    wall = spec.wall_thickness
+
+    arc = max(_MIN_ARC_SEGMENTS, math.ceil(max(spec.top_rect_fillet, spec.bottom_rect_fillet) * math.pi / 2 / resolution))
+    sides = (max(1, math.ceil(width / resolution)), max(1, math.ceil(length / resolution)))
+
+    def ring(w: Real, l: Real, r: Real):
+        return _rounded_rect(np, w, l, r, arc, sides)
+
+    dish = _Dish(np, spec, max(width, width + diff), max(length, length + diff), height)
+
+    # Outside, the walls end where they meet the dish
+    bottom = ring(width, length, spec.bottom_rect_fillet)
+    top = ring(width + diff, length + diff, spec.top_rect_fillet)
+    s = dish.wall_top(bottom, top)
+    layers = max(1, math.ceil(height / (4 * resolution)))
+    outside = []
+    for k in range(layers + 1):
+        t = s * (k / layers)
+        xy = bottom + (top - bottom) * t[:, None]
+        outside.append(np.column_stack([xy, t * height]))
+
+    rings = max(_MIN_TOP_RINGS, math.ceil(min(width + diff, length + diff) / 2 / resolution))
+    edge = outside[-1][:, :2]
+    roof = []
+    for j in range(1, rings):
+        xy = edge * (1 - j / rings)
+        roof.append(np.column_stack([xy, dish.z(xy[:, 0], xy[:, 1])]))
+    roof_center = np.array([[0.0, 0.0, dish.z(np.zeros(1), np.zeros(1))[0]]])
+
+    # Inside, a plain loft with a flat ceiling like QSC._hollow
+    inner_diff = inner_height / height * diff
+    inner_bottom = ring(width - wall * 2, length - wall * 2, 0)
+    inner_top = ring(width - wall * 2 + inner_diff, length - wall * 2 + inner_diff, 0)
+    inside = [np.column_stack([inner_bottom, np.zeros(len(inner_bottom))]),
+              np.column_stack([inner_top, np.full(len(inner_top), inner_height)])]
+    ceiling_center = np.array([[0.0, 0.0, inner_height]])
+
+    builder = _Builder(np)
+    outside = [builder.add(r) for r in outside]
+    roof = [builder.add(r) for r in roof]
+    roof_center = builder.add(roof_center)
+    inside = [builder.add(r) for r in inside]
+    ceiling_center = builder.add(ceiling_center)
+
+    for a, b in zip(outside, outside[1:]):
+        builder.strip(a, b)
+    for a, b in zip([outside[-1], *roof], roof):
+        builder.strip(a, b)
+    builder.fan(roof[-1] if roof else outside[-1], roof_center[0])
+    builder.strip(inside[1], inside[0])
+    builder.fan(inside[1], ceiling_center[0], reverse=True)
+    builder.strip(inside[0], outside[0])
+
+    vertices, triangles = builder.weld()
+    return Mesh(vertices, triangles, name)
+
+
+def _rounded_rect(np, width: Real, length: Real, radius: Real, arc: int, sides: Tuple[int, int]):
+    # Counter clockwise from the +x side. Every ring has the same number of
+    # points in the same places so rings can be stitched point to point.
+    radius = min(radius, width / 2, length / 2)
+    hw, hl = width / 2 - radius, length / 2 - radius
+    corners = [(hw, hl, 0), (-hw, hl, 90), (-hw, -hl, 180), (hw, -hl, 270)]
+    points = []
+    for i, (cx, cy, start) in enumerate(corners):
+        angles = np.radians(start + np.linspace(0, 90, arc + 1))
+        corner = np.column_stack([cx + radius * np.cos(angles), cy + radius * np.sin(angles)])
+        nx, ny, _ = corners[(i + 1) % 4]
+        end = np.array([nx + radius * math.cos(math.radians(start + 90)), ny + radius * math.sin(math.radians(start + 90))])
+        count = sides[i % 2]
+        along = np.linspace(0, 1, count + 1)[1:-1, None]
+        points.append(corner)
+        points.append(corner[-1] + (end - corner[-1]) * along)
+    return np.concatenate(points)
+
+
+class _Dish(object):
+    # The cutter Dish.dish would use, as the lowest point of it above each (x, y)
+    def __init__(self, np, spec, x: Real, y: Real, height: Real):
+        self._np = np
+        self._height = height
+        extra, _, self._ty, _ = DISH_ROW_ADJUSTMENTS[spec.row]
+        angle = math.radians(dict(spec.row_angle).get(spec.row, 0))
+        self._cos, self._sin = math.cos(angle), math.sin(angle)
+        radius = (math.hypot(x, y) - 1 + extra) / 2
+        depth = spec.dish_thickness * (1.5 if spec.homing == "SCOOPED" else 1.0)
+        if spec.dish_type == "SPHERICAL":
+            sphere = (radius ** 2 + depth ** 2) / (2 * depth)
+            self._a, self._c, self._center = sphere, sphere, sphere - depth
+        else:
+            self._a, self._c, self._center = radius, depth, 0.0
+
+    def z(self, x, y):
+        np = self._np
+        # Back into the cutter's frame, where each vertical line is a + b * (z - height)
+        a1 = y * self._cos - self._ty
+        a2 = -y * self._sin + 1 - self._center
+        b1, b2 = self._sin, self._cos
+        qa = b1 ** 2 / self._a ** 2 + b2 ** 2 / self._c ** 2
+        qb = 2 * (a1 * b1 / self._a ** 2 + a2 * b2 / self._c ** 2)
+        qc = (x ** 2 + a1 ** 2) / self._a ** 2 + a2 ** 2 / self._c ** 2 - 1
+        root = np.sqrt(np.maximum(qb ** 2 - 4 * qa * qc, 0))
+        return np.minimum(self._height + (-qb - root) / (2 * qa), self._height)
+
+    def wall_top(self, bottom, top):
+        # Share of the wall below the dish for each column of ring points
+        np = self._np
+        lo, hi = np.zeros(len(bottom)), np.ones(len(bottom))
+        for _ in range(40):
+            s = (lo + hi) / 2
+            xy = bottom + (top - bottom) * s[:, None]
+            below = s * self._height < self.z(xy[:, 0], xy[:, 1])
+            lo, hi = np.where(below, s, lo), np.where(below, hi, s)
+        return (lo + hi) / 2
+
+
+class _Builder(object):
+    def __init__(self, np):
+        self._np = np
+        self._vertices: List = []
+        self._triangles: List = []
+        self._count = 0
+
+    def add(self, points):
+        indices = self._np.arange(self._count, self._count + len(points))
+        self._vertices.append(points)
+        self._count += len(points)
+        return indices
+
+    def strip(self, a, b):
+        # Outward for a below b when both run counter clockwise
+        np = self._np
+        a1, b1 = np.roll(a, -1), np.roll(b, -1)
+        self._triangles.append(np.column_stack([a, a1, b1]))
+        self._triangles.append(np.column_stack([a, b1, b]))
+
+    def fan(self, ring, center: int, reverse: bool = False):
+        np = self._np
+        triangles = np.column_stack([ring, np.roll(ring, -1), np.full(len(ring), center)])
+        self._triangles.append(triangles[:, [1, 0, 2]] if reverse else triangles)
+
+    def weld(self):
+        # Square corners and the roof meeting the walls put several ring points
+        # in the same place, merging them keeps the mesh closed
+        np = self._np
+        return weld(np.concatenate(self._vertices), np.concatenate(self._triangles))
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import os
+from typing import Dict, Iterable, List, Sequence, Tuple, TypeVar
+
+from qsc.export import Mesh, ThreeMFWriter, tessellate_adaptive, write_stl
+from qsc.qsc import QSC
+from qsc.spec import QSCSpec
+from qsc.types import Real
+
+T = TypeVar("T", bound="Plate")
+
+
+def shelf_pack(sizes: Sequence[Tuple[Real, Real]], bed: Tuple[Real, Real], spacing: Real = 0):
+    # Next fit decreasing height: the longest parts open a shelf, the parts
+    # after them fill it left to right, full shelves stack up the bed and a
+    # full bed starts the next plate. Returns the plate and the lower left
+    # corner of every part, in the order they were given.
+    import numpy as np
+
+    sizes = np.asarray(sizes, dtype=float).reshape(-1, 2)
+    too_big = (sizes[:, 0] > bed[0]) | (sizes[:, 1] > bed[1])
+    if np.any(too_big):
+        raise ValueError("Parts do not fit on the bed", np.flatnonzero(too_big).tolist(), bed)
+
+    plates = np.zeros(len(sizes), dtype=int)
+    corners = np.zeros((len(sizes), 2))
+    plate, x, y, shelf = 0, 0.0, 0.0, 0.0
+    for i in np.argsort(-sizes[:, 1], kind="stable"):
+        w, l = sizes[i]
+        if x > 0 and x + w > bed[0]:
+            x, y, shelf = 0.0, y + shelf + spacing, 0.0
+        if y > 0 and y + l > bed[1]:
+            plate, x, y, shelf = plate + 1, 0.0, 0.0, 0.0
+        plates[i] = plate
+        corners[i] = x, y
+        x += w + spacing
+        shelf = max(shelf, l)
+    return plates, corners
+
+
+class Plate(object):
+    _bedWidth: Real = 220
+    _bedLength: Real = 220
+    _spacing: Real = 3
+    _tolerance: Real = None
+
+    def __init__(self, caps: Iterable[QSC] = ()):
+        self._parts: List[Tuple[List[Mesh], Tuple[Real, Real]]] = []
+        self._prepared: Dict[QSCSpec, Tuple[List[Mesh], Tuple[Real, Real]]] = {}
+        for cap in caps:
+            self.add(cap)
+
+    def bed(self, width: Real, length: Real) -> T:
+        self._bedWidth = width
+        self._bedLength = length
+        return self
+
+    def spacing(self, spacing: Real) -> T:
+        self._spacing = spacing
+        return self
+
+    def tolerance(self, tolerance: Real) -> T:
+        self._tolerance = tolerance
+        return self
+
+    def add(self, cap: QSC, count: int = 1) -> T:
+        # Print oriented like QSC.export, every copy of a cap shares its meshes
+        spec = cap.spec()
+        part = self._prepared.get(spec)
+        if part is None:
+            tolerance = cap._quality.value[0] if self._tolerance is None else self._tolerance
+            part = self._prepared[spec] = self._part([tessellate_adaptive(shape, tolerance, name) for name, shape in cap.printable()])
+        self._parts.extend([part] * count)
+        return self
+
+    def add_meshes(self, meshes: List[Mesh], count: int = 1) -> T:
+        # The first mesh is the part itself, anything after it, like a legend,
+        # is printed with it as a separate body
+        self._parts.extend([self._part(meshes)] * count)
+        return self
+
+    def _part(self, meshes: List[Mesh]) -> Tuple[List[Mesh], Tuple[Real, Real]]:
+        import numpy as np
+
+        meshes = [Mesh(np.asarray(m.vertices, dtype=float).reshape(-1, 3), np.asarray(m.triangles, dtype=int).reshape(-1, 3), m.name) for m in meshes]
+        vertices = np.concatenate([m.vertices for m in meshes])
+        low, high = vertices.min(axis=0), vertices.max(axis=0)
+        size = high - low
+        # Long side along the bed width packs tighter on shelves
+        turn = size[1] > size[0]
+        for m in meshes:
+            v = m.vertices - low
+            m.vertices = np.column_stack([size[1] - v[:, 1], v[:, 0], v[:, 2]]) if turn else v
+        footprint = (size[1], size[0]) if turn else (size[0], size[1])
+        return meshes, footprint
+
+    def layout(self) -> List[List[Tuple[int, Real, Real]]]:
+        if not self._parts:
+            return []
+        plates, corners = shelf_pack([size for _, size in self._parts], (self._bedWidth, self._bedLength), self._spacing)
+        layout = [[] for _ in range(plates.max() + 1)]
+        for i, (plate, (x, y)) in enumerate(zip(plates, corners)):
+            layout[plate].append((i, x, y))
+        return layout
+
+    def plates(self) -> List[List[List[Mesh]]]:
+        # Every plate as its parts, each part as its bodies moved into place
+        return [self._placed(placements) for placements in self.layout()]
+
+    def _placed(self, placements: List[Tuple[int, Real, Real]]) -> List[List[Mesh]]:
+        import numpy as np
+
+        parts = []
+        for i, x, y in placements:
+            offset = np.array([x, y, 0.0])
+            parts.append([Mesh(m.vertices + offset, m.triangles, m.name) for m in self._parts[i][0]])
+        return parts
+
+    def export(self, directory: str = ".", name: str = "plate", formats: Iterable[str] = ("3mf",)) -> List[str]:
+        formats = [f.lower() for f in formats]
+        paths = []
+        for number, placements in enumerate(self.layout(), start=1):
+            base = os.path.join(directory, f'{name}_{number}')
+            for fmt in formats:
+                if fmt == "3mf":
+                    paths.append(self._write_3mf(base + ".3mf", placements))
+                elif fmt == "stl":
+                    # Slicers take one STL per material, the legends go in a second file
+                    parts = self._placed(placements)
+                    paths.append(write_stl(base + ".stl", [part[0] for part in parts]))
+                    legends = [m for part in parts for m in part[1:]]
+                    if legends:
+                        paths.append(write_stl(base + "_LEGEND.stl", legends))
+                else:
+                    raise ValueError("Unknown plate format", fmt)
+        return paths
+
+    def _write_3mf(self, path: str, placements: List[Tuple[int, Real, Real]]) -> str:
+        # Copies of a part are written once and placed by their build items
+        objects = {}
+        with ThreeMFWriter(path) as writer:
+            for i, x, y in placements:
+                meshes = self._parts[i][0]
+                if id(meshes) not in objects:
+                    objects[id(meshes)] = writer.add_part(meshes)
+                writer.add_item(objects[id(meshes)], (x, y, 0))
+        return path
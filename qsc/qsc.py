@@ -2,20 +2,31 @@ from __future__ import annotations
 
 import copy
 import math
-from typing import Tuple, Iterable, TypeVar
-
-import cadquery as cq
-from OCP.StdFail import StdFail_NotDone
-
+import os
+import re
+from typing import Callable, List, Tuple, Iterable, TypeVar
+
+from qsc.cache import BuildCache, MemoryCache, cached_shape
+from qsc.dimensions import ROW_ADJUSTMENTS, SCOOPED_HEIGHT, Dimensions, dimensions, raised_offset, stem_positions
+from qsc.export import Mesh, tessellate, tessellate_adaptive, tessellate_faces, write_3mf, write_step, write_stl
+from qsc.fingerprint import fingerprint, state
+from qsc.instrumentation import BuildEvent, listeners, measure
+from qsc.lazy import LazyModule, cq
+from qsc.mesh import cap_mesh
+from qsc.quality import Quality
 from qsc.raised_position import RaisedPosition
+from qsc.raycast import RayCaster
+from qsc.spec import QSCSpec
 from qsc.types import Real
 from qsc import (
+    __version__,
     Percentage,
     Constants,
     MM,
     U,
     Homing,
     HomingType,
+    HollowType,
     RoundingType,
     StepType,
     StepSettings,
@@ -25,12 +36,23 @@ from qsc import (
     Legend,
     LegendSettings,
     Dish,
+    DishType,
     Support,
+    SupportMode,
 )
 from qsc.base import Base, BaseSettings
 
+StdFail = LazyModule("OCP.StdFail")
+
 T = TypeVar("T", bound="QSC")
 
+# Attributes that only control how a cap is built, not what it looks like
+_RUNTIME_ATTRIBUTES = ("_cache", "_stageCache", "_stageHooks")
+
+# Stem solids only depend on the stem settings and height, every cap and
+# every stab position places the same solid.
+_stemTemplates = MemoryCache(32)
+
 
 def _maxFillet(
         self: cq.Shape,
@@ -46,8 +68,8 @@ def _maxFillet(
         window_mid = (window_min + window_max) / 2
         try:
             if not self.fillet(window_mid, edgeList).isValid():
-                raise StdFail_NotDone
-        except StdFail_NotDone:
+                raise StdFail.StdFail_NotDone
+        except StdFail.StdFail_NotDone:
             window_max = window_mid
             continue
 
@@ -61,21 +83,29 @@ def _maxFillet(
     )
 
 
-cq.Shape.maxFillet = _maxFillet
+def _patch(cadquery):
+    cadquery.Shape.maxFillet = _maxFillet
+
+
+cq.on_load(_patch)
 
 
 class QSC(object):
     _bottomFillet = 0.5
     _bottomRectFillet = 1
+    _cache: BuildCache = None
     _dishThickness = MM(1.8).get()
+    _dishType = DishType.SCALED_SPHERE
     _firstLayerHeight = MM(1.2).get()
     _height = MM(8).get()
     _homingType = None  # None, Bar, Scooped, Dot
+    _hollowType = HollowType.LOFT
     _inverted = False
     _isoEnter = False
     _legend = None
     _legendFaceSelection = None
     _length = U(1)
+    _quality = Quality.FINAL
     _row = 3
     _rowAngle = {
         1: 15,
@@ -87,10 +117,13 @@ class QSC(object):
     _raisedWidth = 0
     _specialStabPlacement: Iterable[Tuple[Real, Real, Real]] = None
     _stabs = True
+    _stageCache: MemoryCache | BuildCache = None
+    _stageHooks: Tuple[Callable[[BuildEvent], None], ...] = ()
     _stemSettings = CherrySettings()
     _step = 10
     _stepFillet = 0.6
     _stepHeight = None
+    _supportMode = SupportMode.EXTRUDE
     _raisedPosition = None
     _topDiff = MM(-7).get()
     _topFillet = 0.5
@@ -103,49 +136,64 @@ class QSC(object):
     _fontSize = _height
 
     def __init__(self):
-        pass
-
-    def _stem(self):
-        stemHeight = self._height - self._topThickness
+        # Settings objects are mutable, every cap needs its own
+        self._stemSettings = CherrySettings()
+
+    def __getstate__(self):
+        # Stage hooks are usually closures over the calling process, a pickled cap leaves them behind
+        state = self.__dict__.copy()
+        state.pop("_stageHooks", None)
+        return state
+
+    def _stem(self, stemHeight: Real) -> cq.Shape:
+        key = fingerprint(__version__, "stem", stemHeight, self._stemSettings.get_type(), state(self._stemSettings, ("_offset",)))
+
+        def build():
+            stem = Stem(self._stemSettings).build()
+            return (cq.Workplane("XY")
+                    .placeSketch(stem)
+                    .extrude(stemHeight)
+                    .faces("<Z")
+                    .chamfer(0.24)
+                    .rotate((0, 0, 0), (0, 0, 1), self._stemSettings.get_rotation())
+                    .findSolid()
+                    )
 
-        stem = Stem(self._stemSettings).build()
-        return (cq.Workplane("XY")
-                .placeSketch(stem)
-                .extrude(stemHeight)
-                .faces("<Z")
-                .chamfer(0.24)
-                .rotate((0, 0, 0), (0, 0, 1), self._stemSettings.get_rotation())
-                )
+        return cached_shape(key, build, _stemTemplates, self._cache)
 
     def _stems(self, cap):
-        stem = self._stem()
-        positions = [self._stemSettings.get_offset()]
-
-        if self._specialStabPlacement is not None:
-            positions = [*positions, *self._specialStabPlacement]
-        elif self._stabs:
-            if self._width.u().get() >= 6:
-                positions.append((-50, 0, 0))
-                positions.append((50, 0, 0))
-            elif self._width.u().get() >= 2:
-                positions.append((-12, 0, 0))
-                positions.append((12, 0, 0))
-
-            if self._length.u().get() >= 6:
-                positions.append((0, -50, 0))
-                positions.append((0, 50, 0))
-            elif self._length.u().get() >= 2:
-                positions.append((0, -12, 0))
-                positions.append((0, 12, 0))
-
-        wp = cq.Workplane("XY")
-        for pos in positions:
-            wp.add(stem.translate(pos))
-
-        cap = cap.union(wp.combine())
-        cap = Support(self._stemSettings).positions(positions).build(cap)
+        positions = stem_positions(self._width.u().get(), self._length.u().get(), self._stemSettings.get_offset(),
+                                   self._stabs, self._specialStabPlacement)
+
+        # Located copies share the stem's TShape and go into a single fuse
+        heights = self._stem_heights(cap, positions)
+        instances = [self._stem(height).moved(cq.Location(cq.Vector(*pos))) for pos, height in zip(positions, heights)]
+        cap = cq.Workplane("XY").add(cap.findSolid().fuse(*instances).clean())
+        # Extruding until the next face runs straight through the offset walls of a shelled cap
+        mode = SupportMode.RAYCAST if self._hollowType == HollowType.SHELL else self._supportMode
+        cap = Support(self._stemSettings).positions(positions).mode(mode).build(cap)
         return cap
 
+    def _stem_heights(self, cap, positions) -> List[Real]:
+        default = self._height - self._topThickness
+        if self._hollowType != HollowType.SHELL:
+            return [default] * len(positions)
+
+        # A shelled roof follows the top, so each stem goes up to the highest
+        # point of the ceiling above it and half way into the roof.
+        r = self._stemSettings.get_radius()
+        footprint = [(0, 0), (r, 0), (-r, 0), (0, r), (0, -r)]
+        rays = [((pos[0] + dx, pos[1] + dy, -1), (0, 0, 1)) for pos in positions for dx, dy in footprint]
+        hits = RayCaster(cap.findSolid()).first_hits(rays)
+        heights = []
+        for i in range(len(positions)):
+            ceiling = hits[i * len(footprint):(i + 1) * len(footprint)]
+            if None in ceiling:
+                heights.append(default)
+            else:
+                heights.append(round(max(ceiling) - 1 + self._wallThickness / 2, 2))
+        return heights
+
     def _add_legend(self, cap, dished):
         side = {
             0: "<Y",
@@ -205,6 +253,35 @@ class QSC(object):
                      )
                     ).build()
 
+    def _shell(self, cap):
+        # Offsets the dished outside inwards before any fillet is on it, so the
+        # roof follows the dish and every wall is exactly wall thickness.
+        try:
+            shelled = cap.faces("<Z").shell(-self._wallThickness, kind="arc")
+            if shelled.findSolid().isValid():
+                return shelled
+        except (ValueError, StdFail.StdFail_NotDone):
+            pass
+        self._printSettings()
+        raise ValueError("Shell failed",
+                         "OCCT could not shell this cap with a " + str(self._wallThickness) + "mm wall (r" + str(self._row)
+                         + ", " + str(self._width.u().get()) + "x" + str(self._length.u().get())
+                         + "). Try larger corner radii or HollowType.LOFT.")
+
+    def _shell_problems(self) -> List[Tuple[str, str]]:
+        # Settings OCCT's offset is known to fail on, as (field, message)
+        problems = []
+        if self._dishType == DishType.SCALED_SPHERE:
+            problems.append(("dish_type", "A shelled cap needs an analytic dish, the scaled sphere is a BSpline that does not offset"))
+        if self._isoEnter or self._raisedPosition is not None:
+            problems.append(("hollow_type", "Stepped and ISO enter caps can not be shelled, use HollowType.LOFT"))
+        # A tapered wall is wider than thick, a corner has to be rounder than that to offset inwards
+        limit = self._wallThickness * 1.1
+        for field, radius in (("top_rect_fillet", self._topRectFillet), ("bottom_rect_fillet", self._bottomRectFillet)):
+            if radius <= limit:
+                problems.append((field, f'A shelled cap needs corner radii above {limit:.2f}mm for a {self._wallThickness}mm wall, not {radius}'))
+        return problems
+
     def _dish(self, cap):
         dish = (Dish()
             .dish_thickness(self._dishThickness)
@@ -213,13 +290,15 @@ class QSC(object):
             .inverted(self._inverted)
             .row(
             self._row).row_angle(self._rowAngle).step_settings(
-            (StepSettings().raised_width(self._raisedWidth).raised_length(self._raisedLength).raised_position(self._raisedPosition).step_height(self._stepHeight))))
+            (StepSettings().raised_width(self._raisedWidth).raised_length(self._raisedLength).raised_position(self._raisedPosition).step_height(self._stepHeight)))
+            .dish_type(self._dishType)
+            .cache(self._cache))
         return dish.dish(cap), dish
 
     def _apply_fillet(self, cap, fillet: Real, var: str):
         try:
             cap = cap.fillet(fillet)
-        except StdFail_NotDone:
+        except StdFail.StdFail_NotDone:
             self._printSettings()
             raise ValueError(var + " too big",
                              "Your " + var + " setting [" + str(fillet) + "] is too big for the current shape (r" + str(self._row)
@@ -248,7 +327,11 @@ class QSC(object):
         if self._bottomFillet < 0:
             self._find_max_fillet(cap, "<Z", "bottom")
         if self._bottomFillet > 0:
-            cap = self._apply_fillet(cap.faces("<Z"), self._bottomFillet, "Bottom fillet")
+            bottom = cap.faces("<Z")
+            if bottom.val().innerWires():
+                # A shelled cap's bottom is a ring, only its outside gets rounded
+                bottom = cap.newObject(bottom.val().outerWire().Edges())
+            cap = self._apply_fillet(bottom, self._bottomFillet, "Bottom fillet")
 
         if self._raisedPosition is not None:
             selector = {
@@ -300,6 +383,18 @@ class QSC(object):
         self._dishThickness = thickness
         return self
 
+    def dish_type(self, dish_type: DishType) -> T:
+        self._dishType = dish_type
+        return self
+
+    def hollow_type(self, hollow_type: HollowType) -> T:
+        self._hollowType = hollow_type
+        return self
+
+    def quality(self, quality: Quality) -> T:
+        self._quality = quality
+        return self
+
     def stem_settings(self, stem_settings: StemSettings) -> T:
         self._stemSettings = stem_settings
         return self
@@ -312,15 +407,14 @@ class QSC(object):
         self._specialStabPlacement = placement
         return self
 
+    def support_mode(self, mode: SupportMode) -> T:
+        self._supportMode = mode
+        return self
+
     def homing(self, type: HomingType = HomingType.SCOOPED, adjustHeight=True):
         self._homingType = type
         if type == HomingType.SCOOPED:
-            height_adjustment = {
-                1: 0.6035380213915218,
-                2: 0.3804040372053077,
-                3: 0.2755496042382024,
-                4: 0.0490026944352374
-            }.get(self._row)
+            height_adjustment = SCOOPED_HEIGHT.get(self._row)
             if adjustHeight:
                 self._height += height_adjustment
         return self
@@ -379,12 +473,12 @@ class QSC(object):
             self._raisedLength = raised_l
 
             if self._raisedPosition == RaisedPosition(0, 0):
-                return self.stem_settings(self._stemSettings.offset((0.0, 0.0, 0.0)))
+                return self.stem_settings(copy.copy(self._stemSettings).offset((0.0, 0.0, 0.0)))
 
-            offset_w = self._raisedPosition.x.apply(self._width.mm().get() - self._raisedWidth) / 2
-            offset_l = self._raisedPosition.y.apply(self._length.mm().get() - self._raisedLength) / 2
+            offset_w, offset_l = raised_offset((self._raisedPosition.x.get(), self._raisedPosition.y.get()), self._width.mm().get(),
+                                               self._length.mm().get(), self._raisedWidth, self._raisedLength)
 
-            return self.stem_settings(self._stemSettings.offset((offset_w, offset_l, 0.0)))
+            return self.stem_settings(copy.copy(self._stemSettings).offset((offset_w, offset_l, 0.0)))
 
     def iso_enter(self, iso: bool = True) -> T:
         self._isoEnter = iso
@@ -420,12 +514,7 @@ class QSC(object):
     def row(self, row: int, adjust_row=True) -> T:
         self._row = row
         if adjust_row:
-            row_adjustments = {
-                1: (5, 3),
-                2: (1.5, 0.5),
-                3: (0, 0),
-                4: (2, 1),
-            }.get(self._row)
+            row_adjustments = ROW_ADJUSTMENTS.get(self._row)
             self.height(self._height + row_adjustments[0])
             self.top_thickness(self._topThickness + row_adjustments[1])
         return self
@@ -434,8 +523,88 @@ class QSC(object):
         self._step = steps
         return self
 
+    def cache(self, cache: BuildCache) -> T:
+        self._cache = cache
+        return self
+
+    def stage_cache(self, cache: MemoryCache | BuildCache) -> T:
+        self._stageCache = cache
+        return self
+
+    def on_stage(self, hook: Callable[[BuildEvent], None]) -> T:
+        self._stageHooks = (*self._stageHooks, hook)
+        return self
+
+    def spec(self) -> QSCSpec:
+        return QSCSpec.from_attributes(state(self))
+
+    @staticmethod
+    def from_spec(spec: QSCSpec) -> QSC:
+        cap = QSC()
+        cap.__dict__.update(spec.attributes())
+        return cap
+
+    def fingerprint(self) -> str:
+        return fingerprint(__version__, self.spec().digest())
+
+    def _stage_keys(self):
+        # Every key chains its upstream key, so a stage is only reused when
+        # everything it was built from is unchanged as well.
+        s = self.spec()
+        base = fingerprint(__version__, "base", s.width, s.length, s.height, s.top_diff, s.top_rect_fillet, s.bottom_rect_fillet, s.iso_enter,
+                           s.raised_width, s.raised_length, s.raised_position, s.step_height)
+        dish = fingerprint(base, "dish", s.dish_thickness, s.homing == HomingType.SCOOPED.name, s.inverted, s.row, s.row_angle, s.dish_type)
+        if self._shell_first():
+            hollow = fingerprint(dish, "hollow", s.top_thickness, s.wall_thickness, s.hollow_type)
+            fillet = fingerprint(hollow, "fillet", s.top_fillet, s.bottom_fillet, s.step_fillet)
+            homing = fingerprint(fillet, "homing", s.homing)
+            last = homing
+        else:
+            fillet = fingerprint(dish, "fillet", s.top_fillet, s.bottom_fillet, s.step_fillet)
+            homing = fingerprint(fillet, "homing", s.homing)
+            hollow = fingerprint(homing, "hollow", s.top_thickness, s.wall_thickness, s.hollow_type)
+            last = hollow
+        stems = fingerprint(last, "stems", s.stem, s.special_stab_placement, s.stabs, s.support_mode)
+        legend = fingerprint(stems, "legend", s.legend, s.legend_face_selection, s.first_layer_height, s.font, s.font_size)
+        return {
+            "base": base,
+            "dish": dish,
+            "fillet": fillet,
+            "homing": homing,
+            "hollow": hollow,
+            "stems": stems,
+            "legend": legend,
+        }
+
+    def _shell_first(self) -> bool:
+        return self._hollowType == HollowType.SHELL and self._step > 4
+
+    def _stage(self, name: str, key: str, build):
+        hooks = listeners(self._stageHooks)
+        if not hooks:
+            return self._run_stage(key, build)[0]
+        return measure(name, self.name(), lambda: self._run_stage(key, build), hooks)
+
+    def _run_stage(self, key: str, build):
+        if self._stageCache is None:
+            return build(), False
+
+        shapes = self._stageCache.get(key)
+        if shapes is not None:
+            wps = tuple(None if s is None else cq.Workplane("XY").add(s) for s in shapes)
+            return wps[0] if len(wps) == 1 else wps, True
+
+        result = build()
+        results = result if isinstance(result, tuple) else (result,)
+        self._stageCache.put(key, [None if r is None else r.findSolid() for r in results])
+        return result, False
+
     def clone(self) -> QSC:
-        return copy.deepcopy(self)
+        clone = QSC.from_spec(self.spec())
+        for name in _RUNTIME_ATTRIBUTES:
+            if name in self.__dict__:
+                setattr(clone, name, getattr(self, name))
+        return clone
 
     def _edges(self, e):
         es = []
@@ -449,9 +618,18 @@ class QSC(object):
         print(edges[0])
         return edges
 
+    def validate(self, geometry: bool = False):
+        from qsc.validation import validate
+        return validate(self, geometry)
+
+    def dimensions(self) -> Dimensions:
+        return dimensions(self.spec())
+
+    def mesh(self, resolution: Real = 1.0) -> Mesh:
+        return cap_mesh(self.spec(), resolution, self.name())
+
     def isValid(self):
-        self._step = 2
-        cap, _ = self.build()
+        cap, _ = self.clone().step(2).build()
         plane_faces = cap.faces("%Plane")
         non_plane_faces = cap.faces("not %Plane")
         plane_face_count = len(plane_faces.edges().vals())
@@ -462,47 +640,75 @@ class QSC(object):
             print(plane_face_count, non_plane_face_count)
         return valid, cap
 
-    def build(self, center=True):
-        base = self._base().tag("base")
-        dished = self._dish(base)[0] if self._step > 1 else base
-        cap = self._fillet(dished) if self._step > 2 else dished
-        cap = Homing(self._homingType).add(cap) if self._step > 3 else cap
-        cap = cap.cut(self._hollow()) if self._step > 4 else cap
-        cap = self._stems(cap) if self._step > 5 else cap
-        cap, legend = self._add_legend(cap, dished) if self._step > 6 else (cap, None)
+    def _build(self):
+        if self._quality == Quality.DRAFT:
+            return self._build_draft()
+        problems = self._shell_problems() if self._hollowType == HollowType.SHELL else []
+        if problems:
+            raise ValueError("Can not shell this cap", "; ".join(message for _, message in problems))
+
+        keys = self._stage_keys()
+        shell_first = self._shell_first()
+        base = self._stage("base", keys["base"], self._base).tag("base")
+        dished = self._stage("dish", keys["dish"], lambda: self._dish(base)[0]) if self._step > 1 else base
+        # A fillet does not offset inwards, so a shell is taken before them
+        cap = self._stage("hollow", keys["hollow"], lambda: self._shell(dished)) if shell_first else dished
+        cap = self._stage("fillet", keys["fillet"], lambda: self._fillet(cap)) if self._step > 2 else cap
+        cap = self._stage("homing", keys["homing"], lambda: Homing(self._homingType).add(cap)) if self._step > 3 else cap
+        cap = self._stage("hollow", keys["hollow"], lambda: cap.cut(self._hollow())) if self._step > 4 and not shell_first else cap
+        cap = self._stage("stems", keys["stems"], lambda: self._stems(cap)) if self._step > 5 else cap
+        cap, legend = self._stage("legend", keys["legend"], lambda: self._add_legend(cap, dished)) if self._step > 6 else (cap, None)
+        return cap, legend, base
+
+    def _build_draft(self):
+        # The same envelope and dish profile, without fillets, homing, the inside or the legend
+        draft = self.clone()
+        if draft._dishType == DishType.SCALED_SPHERE:
+            draft._dishType = DishType.REVOLVED_ELLIPSE
+        keys = draft._stage_keys()
+        base = draft._stage("base", keys["base"], draft._base).tag("base")
+        dished = draft._stage("dish", keys["dish"], lambda: draft._dish(base)[0])
+        return dished, None, base
+
+    def _cached_build(self):
+        hooks = listeners(self._stageHooks)
+        if not hooks:
+            return self._run_build()[0]
+        return measure("build", self.name(), self._run_build, hooks)
+
+    def _run_build(self):
+        if self._cache is None:
+            return self._build(), False
+
+        key = self.fingerprint()
+        shapes = self._cache.get(key)
+        if shapes is not None and len(shapes) == 3:
+            cap, legend, base = (None if s is None else cq.Workplane("XY").add(s) for s in shapes)
+            return (cap, legend, base.tag("base")), True
+
+        cap, legend, base = self._build()
+        self._cache.put(key, [cap.findSolid(), None if legend is None else legend.findSolid(), base.findSolid()])
+        return (cap, legend, base), False
+
+    def _centered(self, wp: cq.Workplane | None) -> cq.Workplane | None:
+        return None if wp is None else wp.translate((0, 0, -self._height / 2))
 
+    def build(self, center=True):
+        cap, legend, _ = self._cached_build()
         if center:
-            if legend is not None:
-                return (
-                    cap.translate((0, 0, -self._height / 2)),
-                    legend.translate((0, 0, -self._height / 2)),
-                )
-            return (
-                cap.translate((0, 0, -self._height / 2)),
-                None
-            )
-        else:
-            if legend is not None:
-                return (
-                    cap,
-                    legend if legend is not None else None
-                )
-            return (
-                cap,
-                None
-            )
+            return self._centered(cap), self._centered(legend)
+        return cap, legend
+
+    async def build_async(self, timeout: Real = None):
+        from qsc.aio import default_builder
+        return await default_builder().build(self, timeout)
 
     def rotated(self):
-        c = self.build(False)
-        b = self._base()
-        if c[1] is not None:
-            return (
-                self._rotate(c[0], b, self._stemSettings.get_rotation()),
-                self._rotate(c[1], b, self._stemSettings.get_rotation()),
-            )
+        cap, legend, base = self._cached_build()
+        axis, angle = self._orientation(base, self._stemSettings.get_rotation())
         return (
-            self._rotate(c[0], b, self._stemSettings.get_rotation()),
-            None
+            cap.rotate((0, 0, 0), axis, angle),
+            None if legend is None else legend.rotate((0, 0, 0), axis, angle),
         )
 
     def name(self):
@@ -510,21 +716,50 @@ class QSC(object):
         name = name + "_isoEnter" if self._isoEnter else name + "_" + str(self._width.u().get()) + "x" + str(self._length.u().get())
         name = name + "_i" if self._inverted else name
         name = name + "_stepped" if self._raisedPosition else name
-        name = name + "_" + self._legend if self._legend is not None else name
-        return name
-
-    def exportSTL(self, tolerance=0.02, angularTolerance=0.02):
-        base = self._base()
-        c = self.build()
-        cq.exporters.export(self._rotate(c[0], base, self._stemSettings.get_rotation()), self.name() + ".stl", tolerance=tolerance, angularTolerance=angularTolerance)
-        print("Cap exported")
-        if self._legend is not None:
-            cq.exporters.export(self._rotate(c[1], base, self._stemSettings.get_rotation()), self.name() + "_LEGEND" + ".stl", tolerance=tolerance,
-                                angularTolerance=angularTolerance)
-            print("Legend exported")
+        # Legends like "/" or KLE's HTML labels must not turn into paths
+        name = name + "_" + re.sub(r"[^A-Za-z0-9_-]", "_", self._legend) if self._legend is not None else name
+        # Homing, stems, fillets and the rest only show up in the spec, its digest keeps names apart
+        return name + "_" + self.spec().digest()[:8]
+
+    def printable(self) -> List[Tuple[str, cq.Shape]]:
+        cap, legend, base = self._cached_build()
+        axis, angle = self._orientation(base, self._stemSettings.get_rotation())
+        bodies = [(self.name(), cap)] if legend is None else [(self.name(), cap), (self.name() + "_LEGEND", legend)]
+        return [(name, self._centered(wp).rotate((0, 0, 0), axis, angle).findSolid()) for name, wp in bodies]
+
+    def export(self, directory: str = ".", formats: Iterable[str] = ("stl",), tolerance=None, angularTolerance=None, adaptive: bool = False) -> List[str]:
+        shapes = self.printable()
+        tolerance = self._quality.value[0] if tolerance is None else tolerance
+        angularTolerance = self._quality.value[1] if angularTolerance is None else angularTolerance
+
+        formats = [f.lower() for f in formats]
+        meshes = []
+        if "3mf" in formats and adaptive:
+            meshes = [tessellate_adaptive(shape, tolerance, name) for name, shape in shapes]
+        elif "3mf" in formats or "stl" in formats and not adaptive:
+            meshes = [tessellate(shape, tolerance, angularTolerance, name) for name, shape in shapes]
+
+        paths = []
+        for fmt in formats:
+            if fmt == "stl" and not meshes:
+                # Adaptive STLs are written a face at a time, the whole mesh is never held
+                paths.extend(write_stl(os.path.join(directory, name + ".stl"), tessellate_faces(shape, tolerance)) for name, shape in shapes)
+            elif fmt == "stl":
+                paths.extend(write_stl(os.path.join(directory, mesh.name + ".stl"), [mesh]) for mesh in meshes)
+            elif fmt == "step":
+                paths.append(write_step(os.path.join(directory, self.name() + ".step"), [shape for _, shape in shapes], self.name()))
+            elif fmt == "3mf":
+                # One part, the legend rides along as a second body in its own material
+                paths.append(write_3mf(os.path.join(directory, self.name() + ".3mf"), [meshes]))
+            else:
+                raise ValueError("Unknown export format", fmt)
+        return paths
+
+    def exportSTL(self, tolerance=None, angularTolerance=None, adaptive: bool = False):
+        self.export(".", ("stl",), tolerance, angularTolerance, adaptive)
         return self
 
-    def _rotate(self, cap: cq.Workplane, base: cq.Workplane, stem_rotation: int):
+    def _orientation(self, base: cq.Workplane, stem_rotation: int) -> Tuple[Tuple[int, int, int], Real]:
         face = {
             0: ("<Y", (1, 0, 0)),
             90: (">X", (0, 1, 0)),
@@ -539,9 +774,7 @@ class QSC(object):
                  .getSignedAngle(cq.Vector(0, 0, 1, ))
                  )
 
-        rotation = 180 - math.degrees(angle)
-
-        return cap.rotate((0, 0, 0), face[1], rotation)
+        return face[1], 180 - math.degrees(angle)
 
     def _printSettings(self):
         print(self.__dict__)
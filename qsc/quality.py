@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class Quality(Enum):
+    # (tessellation tolerance, angular tolerance)
+    FINAL = (0.02, 0.02)
+    # Outer envelope and dish only, with an analytic dish and a coarse mesh
+    DRAFT = (0.2, 0.5)
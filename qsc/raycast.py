@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Tuple
+
+from qsc.lazy import LazyModule, cq
+from qsc.types import Real
+
+BRepIntCurveSurface = LazyModule("OCP.BRepIntCurveSurface")
+Geom = LazyModule("OCP.Geom")
+GeomAdaptor = LazyModule("OCP.GeomAdaptor")
+gp = LazyModule("OCP.gp")
+
+Ray = Tuple[Tuple[Real, Real, Real], Tuple[Real, Real, Real]]
+
+
+class RayCaster(object):
+    _tolerance: Real = 1e-6
+
+    def __init__(self, shape: cq.Shape, tolerance: Real = None):
+        if tolerance is not None:
+            self._tolerance = tolerance
+        # Loading the shape once lets every ray reuse the same face classifiers
+        self._inter = BRepIntCurveSurface.BRepIntCurveSurface_Inter()
+        self._inter.Load(shape.wrapped, self._tolerance)
+
+    def first_hits(self, rays: Iterable[Ray]) -> List[Optional[Real]]:
+        hits = []
+        for origin, direction in rays:
+            line = Geom.Geom_Line(gp.gp_Lin(gp.gp_Pnt(*origin), gp.gp_Dir(*direction)))
+            self._inter.Init(GeomAdaptor.GeomAdaptor_Curve(line))
+            nearest = None
+            while self._inter.More():
+                distance = self._inter.W()
+                if distance > self._tolerance and (nearest is None or distance < nearest):
+                    nearest = distance
+                self._inter.Next()
+            hits.append(nearest)
+        return hits
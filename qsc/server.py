@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import resource
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple, TypeVar
+
+from qsc.cache import BuildCache, pack, shape_from_brep, shape_to_brep, unpack
+from qsc.export import stl_bytes, tessellate, tessellate_faces
+from qsc.keyset import qsc_from_dict
+from qsc.lazy import cq
+from qsc.qsc import QSC
+from qsc.types import Real
+
+T = TypeVar("T", bound="BuildServer")
+
+_FORMATS = ("brep", "stl")
+_CONTENT_TYPE = "application/x-qsc"
+
+
+def _rss() -> int:
+    # Current resident set where /proc has it, the peak otherwise
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _warm():
+    # Pays for the OCCT import, the font manager and the stem, dish and glyph
+    # templates before the first real request arrives.
+    QSC().legend("A").build()
+
+
+def _render(request: Dict, cache: Optional[BuildCache]) -> Tuple[List[str], List[bytes]]:
+    cap = qsc_from_dict(request["spec"])
+    if cache is not None:
+        cap.cache(cache)
+    shapes = cap.printable()
+    names = [name for name, _ in shapes]
+    if request.get("format", "brep") == "stl":
+        tolerance = request.get("tolerance", 0.02)
+        angular_tolerance = request.get("angular_tolerance", 0.02)
+        if request.get("adaptive", False):
+            return names, [stl_bytes(tessellate_faces(shape, tolerance)) for _, shape in shapes]
+        return names, [stl_bytes([tessellate(shape, tolerance, angular_tolerance, name)]) for name, shape in shapes]
+    return names, [shape_to_brep(shape) for _, shape in shapes]
+
+
+def _work(conn, directory: Optional[str], warm: bool, max_builds: Optional[int], max_rss: Optional[int]):
+    cache = None if directory is None else BuildCache(directory)
+    if warm:
+        _warm()
+    conn.send(("ready", None, False))
+
+    builds = 0
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+
+        try:
+            reply = ("ok", _render(request, cache))
+        except ValueError as e:
+            reply = ("invalid", str(e))
+        except Exception as e:
+            reply = ("error", repr(e))
+
+        # OCCT processes only grow, so a worker retires itself and the server starts a fresh one
+        builds += 1
+        retire = (max_builds is not None and builds >= max_builds) or (max_rss is not None and _rss() > max_rss)
+        conn.send((*reply, retire))
+        if retire:
+            return
+
+
+class _Worker(object):
+    def __init__(self, context, directory: Optional[str], warm: bool, max_builds: Optional[int], max_rss: Optional[int]):
+        self._conn, child = context.Pipe()
+        self._process = context.Process(target=_work, args=(child, directory, warm, max_builds, max_rss), daemon=True)
+        self._process.start()
+        child.close()
+        try:
+            self._conn.recv()
+        except EOFError:
+            self.close()
+            raise RuntimeError("Build worker failed to start", self._process.exitcode)
+
+    def run(self, request: Dict) -> Tuple[str, object, bool]:
+        self._conn.send(request)
+        return self._conn.recv()
+
+    def close(self):
+        try:
+            self._conn.send(None)
+        except OSError:
+            pass
+        self._process.join(5)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._conn.close()
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    builder: BuildServer = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _HTTPServer
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._json(404, {"error": "Not found"})
+            return
+        self._json(200, self.server.builder.stats())
+
+    def do_POST(self):
+        if self.path != "/build":
+            self._json(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length).decode("utf-8"))
+            if not isinstance(request, dict) or not isinstance(request.get("spec"), dict):
+                raise ValueError("Expected a JSON object with a spec")
+            if request.get("format", "brep") not in _FORMATS:
+                raise ValueError("Unknown format", request.get("format"))
+        except ValueError as e:
+            self._json(400, {"error": str(e)})
+            return
+
+        status, payload = self.server.builder.submit(request)
+        if status != "ok":
+            self._json({"invalid": 400, "unavailable": 503}.get(status, 500), {"error": payload})
+            return
+
+        names, blobs = payload
+        body = pack(blobs)
+        self.send_response(200)
+        self.send_header("Content-Type", _CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-QSC-Names", json.dumps(names))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, code: int, value: Dict):
+        body = json.dumps(value).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BuildServer(object):
+    _host: str = "127.0.0.1"
+    _port: int = 0
+    _workers: int = 2
+    _maxBuilds: int = 200
+    _maxRss: int = 1536 * 1024 * 1024
+    _warm: bool = True
+    _cache: BuildCache = None
+    _queueTimeout: Real = 300
+
+    def __init__(self, host: str = None, port: int = None):
+        if host is not None:
+            self._host = host
+        if port is not None:
+            self._port = port
+        self._httpd: Optional[_HTTPServer] = None
+        self._idle: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._builds = 0
+        self._recycled = 0
+        self._stopping = False
+
+    def workers(self, workers: int) -> T:
+        self._workers = workers
+        return self
+
+    def max_builds(self, builds: Optional[int]) -> T:
+        self._maxBuilds = builds
+        return self
+
+    def max_rss(self, rss: Optional[int]) -> T:
+        self._maxRss = rss
+        return self
+
+    def warm(self, warm: bool = True) -> T:
+        self._warm = warm
+        return self
+
+    def cache(self, cache: BuildCache) -> T:
+        self._cache = cache
+        return self
+
+    def queue_timeout(self, seconds: Optional[Real]) -> T:
+        # How long a request waits for a free worker before it gets a 503, None waits forever
+        self._queueTimeout = seconds
+        return self
+
+    def address(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self._workers,
+                "idle": self._idle.qsize(),
+                "builds": self._builds,
+                "recycled": self._recycled,
+            }
+
+    def start(self) -> T:
+        self._stopping = False
+        for _ in range(self._workers):
+            self._idle.put(self._spawn())
+        self._httpd = _HTTPServer((self._host, self._port), _Handler)
+        self._httpd.builder = self
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stopping = True
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def __enter__(self) -> T:
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def submit(self, request: Dict) -> Tuple[str, object]:
+        try:
+            worker = self._idle.get(timeout=self._queueTimeout)
+        except queue.Empty:
+            return "unavailable", f'No build worker became free within {self._queueTimeout}s'
+        try:
+            status, payload, retire = worker.run(request)
+        except (EOFError, OSError):
+            self._replace(worker)
+            return "error", "Build worker died"
+
+        with self._lock:
+            self._builds += 1
+        if retire:
+            self._replace(worker)
+        else:
+            self._idle.put(worker)
+        return status, payload
+
+    def _spawn(self) -> _Worker:
+        directory = None if self._cache is None else self._cache.get_directory()
+        return _Worker(multiprocessing.get_context("spawn"), directory, self._warm, self._maxBuilds, self._maxRss)
+
+    def _replace(self, worker: _Worker):
+        with self._lock:
+            self._recycled += 1
+
+        # Warming a new worker takes seconds, the request that retired the old one does not wait for it
+        def replace():
+            worker.close()
+            delay = 1
+            while not self._stopping:
+                try:
+                    fresh = self._spawn()
+                except Exception as e:
+                    # Giving up would shrink the pool for good, so keep trying
+                    print(f'Build worker failed to start, retrying in {delay}s: {e!r}', file=sys.stderr, flush=True)
+                    time.sleep(delay)
+                    delay = min(delay * 2, 60)
+                    continue
+                if self._stopping:
+                    fresh.close()
+                else:
+                    self._idle.put(fresh)
+                return
+
+        threading.Thread(target=replace, daemon=True).start()
+
+
+class BuildClient(object):
+    def __init__(self, url: str, timeout: Real = None):
+        self._url = url.rstrip("/")
+        self._timeout = timeout
+
+    def health(self) -> Dict:
+        with urllib.request.urlopen(self._url + "/health", timeout=self._timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def build(self, spec: Dict, format: str = "brep", tolerance: Real = 0.02, angular_tolerance: Real = 0.02, adaptive: bool = False) -> Dict[str, bytes]:
+        body = json.dumps({"spec": spec, "format": format, "tolerance": tolerance, "angular_tolerance": angular_tolerance,
+                           "adaptive": adaptive}).encode("utf-8")
+        request = urllib.request.Request(self._url + "/build", data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self._timeout) as response:
+                names = json.loads(response.headers["X-QSC-Names"])
+                return dict(zip(names, unpack(response.read())))
+        except urllib.error.HTTPError as e:
+            error = json.loads(e.read().decode("utf-8")).get("error")
+            if e.code == 400:
+                raise ValueError(error)
+            raise RuntimeError(error)
+
+    def shapes(self, spec: Dict) -> Dict[str, cq.Shape]:
+        return {name: shape_from_brep(blob) for name, blob in self.build(spec, "brep").items()}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve QSC builds from warm worker processes")
+    parser.add_argument("--host", default=BuildServer._host)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or BuildServer._workers)
+    parser.add_argument("--max-builds", type=int, default=BuildServer._maxBuilds)
+    parser.add_argument("--max-rss-mb", type=int, default=BuildServer._maxRss // (1024 * 1024))
+    parser.add_argument("--cache", help="Directory of a build cache shared by every worker")
+    parser.add_argument("--queue-timeout", type=float, default=BuildServer._queueTimeout,
+                        help="Seconds a request waits for a free worker before it is answered with 503")
+    args = parser.parse_args(argv)
+
+    server = (BuildServer(args.host, args.port)
+              .workers(args.workers)
+              .max_builds(args.max_builds)
+              .max_rss(args.max_rss_mb * 1024 * 1024)
+              .cache(None if args.cache is None else BuildCache(args.cache))
+              .queue_timeout(args.queue_timeout)
+              .start()
+              )
+    print(f'Serving QSC builds on {server.address()}', flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
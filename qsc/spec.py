@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import json
+from enum import Enum
+from typing import Any, Callable, Dict, Tuple, Type
+
+from qsc.dish_type import DishType
+from qsc.fingerprint import fingerprint, state
+from qsc.hollow_type import HollowType
+from qsc.homing_type import HomingType
+from qsc.mm import MM
+from qsc.percentage import Percentage
+from qsc.quality import Quality
+from qsc.raised_position import RaisedPosition
+from qsc.stem.cherry_settings import CherrySettings
+from qsc.stem.stem_settings import StemSettings
+from qsc.stem.stem_type import StemType
+from qsc.stem.support_mode import SupportMode
+from qsc.u import U
+
+_UNITS: Dict[str, Type] = {
+    "u": U,
+    "mm": MM,
+    "percentage": Percentage,
+}
+
+_STEM_SETTINGS: Dict[StemType, Callable[[], StemSettings]] = {
+    StemType.CHERRY: CherrySettings,
+}
+
+
+def _number(value):
+    if isinstance(value, int):
+        return value
+    return round(float(value), 9) + 0.0
+
+
+def _freeze(value):
+    # JSON hands back lists, specs only hold tuples so they stay hashable
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return _number(value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+def _encode_value(value):
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    for name, unit in _UNITS.items():
+        if type(value) is unit:
+            return name, _number(value.get())
+    if isinstance(value, (int, float)):
+        return _number(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_encode_value(v) for v in value)
+    raise ValueError("Can not put value in a spec", value)
+
+
+def _decode_value(value):
+    if isinstance(value, tuple):
+        if len(value) == 2 and isinstance(value[0], str) and value[0] in _UNITS:
+            return _UNITS[value[0]](value[1])
+        return tuple(_decode_value(v) for v in value)
+    return value
+
+
+def _encode_enum(value: Enum | None):
+    return None if value is None else value.name
+
+
+def _enum_decoder(enum: Type[Enum]) -> Callable[[Any], Enum | None]:
+    return lambda name: None if name is None else enum[name]
+
+
+def _encode_position(position: RaisedPosition | None):
+    return None if position is None else (_number(position.x.get()), _number(position.y.get()))
+
+
+def _decode_position(position):
+    return None if position is None else RaisedPosition(*position)
+
+
+def _encode_row_angle(angles: Dict[int, Any]):
+    return tuple(sorted((row, _number(angle)) for row, angle in angles.items()))
+
+
+def _decode_row_angle(angles):
+    return {row: angle for row, angle in angles}
+
+
+def _encode_stem(settings: StemSettings):
+    values = tuple(sorted((name, _encode_value(value)) for name, value in state(settings).items()))
+    return settings.get_type().name, values
+
+
+def _decode_stem(stem) -> StemSettings:
+    # Every builder gets its own settings object, nothing is shared between caps
+    settings = _STEM_SETTINGS[StemType[stem[0]]]()
+    for name, value in stem[1]:
+        setattr(settings, name, _decode_value(value))
+    return settings
+
+
+# Spec field -> (builder attribute, encode, decode)
+_FIELDS: Dict[str, Tuple[str, Callable, Callable]] = {
+    "width": ("_width", _encode_value, _decode_value),
+    "length": ("_length", _encode_value, _decode_value),
+    "height": ("_height", _encode_value, _decode_value),
+    "row": ("_row", _encode_value, _decode_value),
+    "row_angle": ("_rowAngle", _encode_row_angle, _decode_row_angle),
+    "top_diff": ("_topDiff", _encode_value, _decode_value),
+    "dish_thickness": ("_dishThickness", _encode_value, _decode_value),
+    "dish_type": ("_dishType", _encode_enum, _enum_decoder(DishType)),
+    "top_thickness": ("_topThickness", _encode_value, _decode_value),
+    "wall_thickness": ("_wallThickness", _encode_value, _decode_value),
+    "hollow_type": ("_hollowType", _encode_enum, _enum_decoder(HollowType)),
+    "top_fillet": ("_topFillet", _encode_value, _decode_value),
+    "bottom_fillet": ("_bottomFillet", _encode_value, _decode_value),
+    "step_fillet": ("_stepFillet", _encode_value, _decode_value),
+    "top_rect_fillet": ("_topRectFillet", _encode_value, _decode_value),
+    "bottom_rect_fillet": ("_bottomRectFillet", _encode_value, _decode_value),
+    "homing": ("_homingType", _encode_enum, _enum_decoder(HomingType)),
+    "inverted": ("_inverted", _encode_value, _decode_value),
+    "iso_enter": ("_isoEnter", _encode_value, _decode_value),
+    "raised_position": ("_raisedPosition", _encode_position, _decode_position),
+    "raised_width": ("_raisedWidth", _encode_value, _decode_value),
+    "raised_length": ("_raisedLength", _encode_value, _decode_value),
+    "step_height": ("_stepHeight", _encode_value, _decode_value),
+    "stabs": ("_stabs", _encode_value, _decode_value),
+    "special_stab_placement": ("_specialStabPlacement", _encode_value, _decode_value),
+    "stem": ("_stemSettings", _encode_stem, _decode_stem),
+    "support_mode": ("_supportMode", _encode_enum, _enum_decoder(SupportMode)),
+    "legend": ("_legend", _encode_value, _decode_value),
+    "legend_face_selection": ("_legendFaceSelection", _encode_value, _decode_value),
+    "first_layer_height": ("_firstLayerHeight", _encode_value, _decode_value),
+    "font": ("_font", _encode_value, _decode_value),
+    "font_size": ("_fontSize", _encode_value, _decode_value),
+    "step": ("_step", _encode_value, _decode_value),
+    "quality": ("_quality", _encode_enum, _enum_decoder(Quality)),
+}
+
+
+class QSCSpec(object):
+    __slots__ = (*_FIELDS.keys(), "_hash", "_digest")
+
+    def __init__(self, **values):
+        missing = set(_FIELDS.keys()) - set(values.keys())
+        unknown = set(values.keys()) - set(_FIELDS.keys())
+        if missing or unknown:
+            raise ValueError("Spec fields do not match", sorted(missing), sorted(unknown))
+        for name in _FIELDS.keys():
+            object.__setattr__(self, name, _freeze(values[name]))
+        object.__setattr__(self, "_hash", None)
+        object.__setattr__(self, "_digest", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("QSCSpec is frozen")
+
+    def __delattr__(self, name):
+        raise AttributeError("QSCSpec is frozen")
+
+    def __repr__(self):
+        return "QSCSpec(" + ", ".join(f'{name}={getattr(self, name)!r}' for name in _FIELDS.keys()) + ")"
+
+    def __eq__(self, other):
+        if not isinstance(other, QSCSpec):
+            return NotImplemented
+        return self is other or (hash(self) == hash(other) and self._values() == other._values())
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash(self._values()))
+        return self._hash
+
+    def __reduce__(self):
+        return QSCSpec.from_dict, (self.to_dict(),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def _values(self) -> Tuple:
+        return tuple(getattr(self, name) for name in _FIELDS.keys())
+
+    @staticmethod
+    def from_attributes(attributes: Dict[str, Any]) -> QSCSpec:
+        return QSCSpec(**{name: encode(attributes[attr]) for name, (attr, encode, _) in _FIELDS.items()})
+
+    def attributes(self) -> Dict[str, Any]:
+        return {attr: decode(getattr(self, name)) for name, (attr, _, decode) in _FIELDS.items()}
+
+    @staticmethod
+    def from_dict(values: Dict) -> QSCSpec:
+        return QSCSpec(**values)
+
+    def to_dict(self) -> Dict:
+        return {name: _thaw(getattr(self, name)) for name in _FIELDS.keys()}
+
+    @staticmethod
+    def from_json(data: str) -> QSCSpec:
+        return QSCSpec.from_dict(json.loads(data))
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), sort_keys=True, separators=(",", ":"))
+
+    def replace(self, **changes) -> QSCSpec:
+        return QSCSpec(**{**self.to_dict(), **changes})
+
+    def digest(self) -> str:
+        if self._digest is None:
+            object.__setattr__(self, "_digest", fingerprint(self.to_dict()))
+        return self._digest
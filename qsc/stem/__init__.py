@@ -1,6 +1,7 @@
 from qsc.stem.stem_settings import StemSettings
 from qsc.stem.cherry_settings import CherrySettings
 from qsc.stem.support import Support
+from qsc.stem.support_mode import SupportMode
 from qsc.stem.stem_type import StemType
 from qsc.stem.stem import Stem
 
@@ -9,5 +10,6 @@ __all__ = {
     "CherrySettings",
     "StemType",
     "Support",
+    "SupportMode",
     "Stem",
 }
@@ -1,4 +1,6 @@
-from cadquery import Sketch
+from __future__ import annotations
+
+from qsc.lazy import cq
 
 from qsc.stem.stem_settings import StemSettings
 from qsc.stem.cherry_settings import CherrySettings
@@ -11,17 +13,17 @@ class Stem(object):
     def __init__(self, settings: StemSettings):
         self._settings = settings
 
-    def build(self) -> Sketch:
+    def build(self) -> cq.Sketch:
         type = self._settings.get_type()
         if type == StemType.CHERRY:
             return self._cherry_stem(self._settings)
         else:
-            return Sketch().rect(10, 10)
+            return cq.Sketch().rect(10, 10)
 
     @staticmethod
-    def _cherry_stem(settings: CherrySettings) -> Sketch:
+    def _cherry_stem(settings: CherrySettings) -> cq.Sketch:
         cross = (1.5 + settings.get_hslop(), 4.2 + settings.get_vslop())
-        return (Sketch()
+        return (cq.Sketch()
                 .circle(settings.get_radius())
                 .rect(cross[0], cross[1], mode="s")
                 .rect(cross[1], cross[0], mode="s")
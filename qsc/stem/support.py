@@ -1,8 +1,14 @@
-import cadquery as cq
+from __future__ import annotations
+
+import math
+
+from qsc.lazy import cq
 from typing import TypeVar, List
+from qsc.raycast import RayCaster
 from qsc.stem.stem_settings import StemSettings
 from qsc.stem.cherry_settings import CherrySettings
 from qsc.stem.stem_type import StemType
+from qsc.stem.support_mode import SupportMode
 
 T = TypeVar("T", bound="Support")
 
@@ -10,6 +16,7 @@ T = TypeVar("T", bound="Support")
 class Support(object):
     _settings: StemSettings = None
     _positions: List = [(0, 0, 0)]
+    _mode: SupportMode = SupportMode.EXTRUDE
 
     def __init__(self, settings: StemSettings):
         self._settings = settings
@@ -18,12 +25,18 @@ class Support(object):
         self._positions = positions
         return self
 
+    def mode(self, mode: SupportMode) -> T:
+        self._mode = mode
+        return self
+
     def build(self, cap: cq.Workplane) -> cq.Workplane:
         if not self._settings.get_support():
             return cap
 
         match self._settings.get_type():
             case StemType.CHERRY:
+                if self._mode == SupportMode.RAYCAST:
+                    return self._cherry_raycast(cap, self._settings, self._positions)
                 return self._cherry(cap, self._settings, self._positions)
 
         return cap
@@ -89,3 +102,47 @@ class Support(object):
         for pos in positions:
             wp.add(support(cap, delta, push_value, pos, settings.get_rotation()))
         return cap.union(wp.combine())
+
+    def _cherry_raycast(self, cap: cq.Workplane, settings: CherrySettings, positions: List):
+        delta = 0.15
+        # Walls are found at the middle of the fin, a round stem falls away
+        # towards its edges and more so over its bottom chamfer
+        overlap = 0.2
+        push_value = settings.get_radius() + delta
+        rotation = settings.get_rotation()
+        out = (round(math.sin(math.radians(rotation)), 9), round(-math.cos(math.radians(rotation)), 9))
+        start = push_value + delta / 2
+
+        # Same pillar as the extruded supports: from the bottom up to the
+        # ceiling next to the stem, but found with rays instead of booleans.
+        caster = RayCaster(cap.findSolid())
+        pillars = [(pos[0] + out[0] * push_value, pos[1] + out[1] * push_value) for pos in positions]
+        ceilings = caster.first_hits([((x, y, delta), (0, 0, 1)) for x, y in pillars])
+        if None in ceilings:
+            return self._cherry(cap, settings, positions)
+
+        # Rays start delta above the floor and fins stop delta below the ceiling
+        tops = ceilings
+        walls = caster.first_hits(
+            [((pos[0] + out[0] * start, pos[1] + out[1] * start, z), (out[0], out[1], 0))
+             for pos, top in zip(positions, tops)
+             for z in (delta / 2, top)]
+        )
+        if None in walls:
+            return self._cherry(cap, settings, positions)
+
+        fins = []
+        for i, (pos, top) in enumerate(zip(positions, tops)):
+            bottom_wall = start + walls[2 * i] + overlap
+            top_wall = start + walls[2 * i + 1] + overlap
+            # Drawn for a support pointing towards -Y, then turned with the stem
+            fin = (cq.Workplane("YZ")
+                   .polyline([(-start, 0), (-bottom_wall, 0), (-top_wall, top), (-start, top)])
+                   .close()
+                   .extrude(0.5, both=True)
+                   .findSolid()
+                   .moved(cq.Location(cq.Vector(pos[0], pos[1], 0), cq.Vector(0, 0, 1), rotation))
+                   )
+            fins.append(fin)
+
+        return cq.Workplane("XY").add(cap.findSolid().fuse(*fins).clean())
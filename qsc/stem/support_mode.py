@@ -0,0 +1,6 @@
+from enum import Enum, auto
+
+
+class SupportMode(Enum):
+    EXTRUDE = auto()
+    RAYCAST = auto()
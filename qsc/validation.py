@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from typing import List
+
+from qsc.dimensions import stem_positions
+from qsc.fillet_limits import FilletLimits
+from qsc.hollow_type import HollowType
+from qsc.homing_type import HomingType
+from qsc.lazy import LazyModule
+from qsc.qsc import QSC
+from qsc.spec import QSCSpec
+from qsc.step_settings import StepSettings
+
+Standard = LazyModule("OCP.Standard")
+
+# Rough advance width of an average glyph and height of a capital letter as a share of the font size
+_GLYPH_WIDTH = 0.6
+_GLYPH_HEIGHT = 0.72
+
+
+class Issue(object):
+    def __init__(self, field: str, message: str):
+        self.field = field
+        self.message = message
+
+    def __repr__(self):
+        return f'Issue(field={self.field!r}, message={self.message!r})'
+
+    def __str__(self):
+        return self.field + ": " + self.message
+
+    def __eq__(self, other):
+        if isinstance(other, Issue):
+            return self.field == other.field and self.message == other.message
+        return False
+
+
+def validate(cap: QSC | QSCSpec, geometry: bool = False, limits: FilletLimits = None) -> List[Issue]:
+    cap = QSC.from_spec(cap) if isinstance(cap, QSCSpec) else cap
+    issues = _analytic(cap)
+    if limits is not None:
+        issues.extend(_fillet_limits(cap, limits))
+    # Geometry only makes sense for settings that already add up
+    if geometry and not issues:
+        issues.extend(_geometric(cap))
+    return issues
+
+
+def _analytic(cap: QSC) -> List[Issue]:
+    issues = []
+
+    def check(ok: bool, field: str, message: str):
+        if not ok:
+            issues.append(Issue(field, message))
+
+    width = cap._width.mm().get()
+    length = cap._length.mm().get()
+    height = cap._height
+    check(cap._row in (1, 2, 3, 4), "row", f'Row {cap._row} is not one of 1, 2, 3 or 4')
+    check(width > 0, "width", "Width has to be positive")
+    check(length > 0, "length", "Length has to be positive")
+    check(height > 0, "height", "Height has to be positive")
+    check(cap._wallThickness > 0, "wall_thickness", "Wall thickness has to be positive")
+    check(0 < cap._topThickness < height, "top_thickness", f'Top thickness {cap._topThickness} has to be between 0 and the height {height}')
+    if issues:
+        return issues
+
+    top_width = width + cap._topDiff
+    top_length = length + cap._topDiff
+    check(top_width > 0 and top_length > 0, "top_diff", f'Top diff {cap._topDiff} leaves no top on a {width:.2f}x{length:.2f}mm cap')
+    if issues:
+        return issues
+
+    top_short = min(top_width, top_length)
+    bottom_short = min(width, length)
+    check(cap._topRectFillet < top_short / 2, "top_rect_fillet", f'Top corner radius {cap._topRectFillet} does not fit a {top_short:.2f}mm top')
+    check(cap._bottomRectFillet < bottom_short / 2, "bottom_rect_fillet", f'Bottom corner radius {cap._bottomRectFillet} does not fit a {bottom_short:.2f}mm base')
+    check(cap._topFillet < top_short / 2, "top_fillet", f'Top fillet {cap._topFillet} is too big for a {top_short:.2f}mm top')
+    check(cap._topFillet < height / 2, "top_fillet", f'Top fillet {cap._topFillet} is too big for a {height:.2f}mm high cap')
+    check(cap._bottomFillet < cap._wallThickness, "bottom_fillet", f'Bottom fillet {cap._bottomFillet} would cut through a {cap._wallThickness}mm wall')
+    check(cap._topFillet + cap._bottomFillet < height, "top_fillet", "Top and bottom fillet together are taller than the cap")
+
+    depth = cap._dishThickness * (1.5 if cap._homingType == HomingType.SCOOPED else 1.0)
+    if cap._hollowType == HollowType.LOFT:
+        # The dish cutter sits 1mm below the top face
+        check(depth + 1 < cap._topThickness, "dish_thickness", f'A {depth:.2f}mm dish cuts through a {cap._topThickness}mm top')
+    else:
+        # A shelled roof follows the dish, it is wall thickness wherever the dish is
+        issues.extend(Issue(field, message) for field, message in cap._shell_problems())
+
+    # The cavity narrows towards the top the same way the outside does
+    inner = height - cap._topThickness
+    inner_diff = inner / height * cap._topDiff
+    cavity_width = width - cap._wallThickness * 2 + inner_diff
+    cavity_length = length - cap._wallThickness * 2 + inner_diff
+    # Every stem, stabilizers included, where the build puts it
+    radius = cap._stemSettings.get_radius()
+    positions = stem_positions(cap._width.u().get(), cap._length.u().get(), cap._stemSettings.get_offset(), cap._stabs, cap._specialStabPlacement)
+    for i, (x, y, _) in enumerate(positions):
+        fits = abs(x) + radius <= cavity_width / 2 and abs(y) + radius <= cavity_length / 2
+        if i == 0:
+            check(fits, "wall_thickness", f'A {radius * 2:.2f}mm stem does not fit inside {cavity_width:.2f}x{cavity_length:.2f}mm walls')
+        else:
+            check(fits, "wall_thickness", f'The stabilizer stem at ({x:.2f}, {y:.2f}) does not fit inside {cavity_width:.2f}x{cavity_length:.2f}mm walls')
+
+    if cap._raisedPosition is not None:
+        check(0 < cap._raisedWidth <= width, "stepped", f'Raised width {cap._raisedWidth:.2f} has to be within the {width:.2f}mm width')
+        check(0 < cap._raisedLength <= length, "stepped", f'Raised length {cap._raisedLength:.2f} has to be within the {length:.2f}mm length')
+        check(cap._raisedWidth > cap._wallThickness * 2 and cap._raisedLength > cap._wallThickness * 2, "stepped",
+              "The raised part is narrower than two walls")
+        raised_short = min(cap._raisedWidth, cap._raisedLength)
+        check(cap._stepFillet < raised_short / 2, "step_fillet", f'Step fillet {cap._stepFillet} is too big for a {raised_short:.2f}mm step')
+        if cap._stepHeight is not None:
+            step = _step_height(cap)
+            check(0 < step < height, "stepped", f'Step height {step:.2f} has to be between 0 and the height {height:.2f}')
+
+    if cap._legend is not None:
+        # Legends go on the side face the stem rotation points to
+        face_width = width if cap._stemSettings.get_rotation() in (0, 180) else length
+        face_height = height - cap._bottomFillet - cap._topFillet
+        text_width = len(cap._legend) * cap._fontSize * _GLYPH_WIDTH
+        check(len(cap._legend) > 0, "legend", "Legend is empty")
+        check(cap._fontSize > 0, "font_size", "Font size has to be positive")
+        check(cap._fontSize * _GLYPH_HEIGHT <= face_height, "font_size", f'Font size {cap._fontSize} is taller than the {face_height:.2f}mm face')
+        check(text_width <= face_width, "legend", f'"{cap._legend}" is about {text_width:.1f}mm wide, the face is {face_width:.2f}mm')
+        check(0 < cap._firstLayerHeight < cap._wallThickness, "legend",
+              f'Legend depth {cap._firstLayerHeight} has to be between 0 and the wall thickness {cap._wallThickness}')
+
+    return issues
+
+
+def _step_height(cap: QSC) -> float:
+    return StepSettings().step_height(cap._stepHeight).apply_step_height(cap._height)
+
+
+def _fillet_limits(cap: QSC, limits: FilletLimits) -> List[Issue]:
+    issues = []
+    for which, field, value in (("top", "top_fillet", cap._topFillet), ("bottom", "bottom_fillet", cap._bottomFillet), ("step", "step_fillet", cap._stepFillet)):
+        if which == "step" and cap._raisedPosition is None:
+            continue
+        limit = limits.lookup(cap, which)
+        if limit is not None and value > limit:
+            issues.append(Issue(field, f'{value} is above the measured limit of {limit:.3f}'))
+    return issues
+
+
+def _geometric(cap: QSC) -> List[Issue]:
+    # Only the lofts, no dish, fillets or booleans
+    probe = cap.clone().cache(None).stage_cache(None)
+    issues = []
+    try:
+        if not probe._base().findSolid().isValid():
+            issues.append(Issue("base", "The outside does not loft into a valid solid"))
+        if probe._hollowType == HollowType.LOFT and not probe._hollow().findSolid().isValid():
+            issues.append(Issue("wall_thickness", "The inside does not loft into a valid solid"))
+    except (ValueError, Standard.Standard_Failure) as e:
+        issues.append(Issue("base", f'The base can not be built: {e}'))
+    return issues
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import pickle
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+from qsc import AsyncBuilder, QSC, U, build_many_async
+from qsc.keyset import build_brep
+
+
+def _crash_on_row_4(spec, cache):
+    if spec.row == 4:
+        os._exit(1)
+    return build_brep(spec, cache)
+
+
+class AsyncBuilderTest(unittest.TestCase):
+    def test_pickle_leaves_hooks_behind(self):
+        cap = QSC().row(2).width(U(2)).legend("A").on_stage(lambda event: None)
+        copy = pickle.loads(pickle.dumps(cap))
+        self.assertEqual((), copy._stageHooks)
+        self.assertEqual(cap.fingerprint(), copy.fingerprint())
+        self.assertEqual(cap._stageHooks, cap.clone()._stageHooks)
+
+    def test_bad_spec_fails_the_batch(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(AsyncBuilder(workers=1).build_many([{"row": 3}, {"colour": "red"}]))
+
+    def test_build_many(self):
+        built = asyncio.run(build_many_async([{"row": 3}, QSC().row(2).legend("A")]))
+        self.assertEqual(2, len(built))
+        self.assertIsNone(built[0][1])
+        self.assertIsNotNone(built[1][1])
+        self.assertTrue(built[0][0].findSolid().isValid())
+
+    def test_timeout(self):
+        async def run():
+            async with AsyncBuilder(workers=1) as builder:
+                with self.assertRaises(asyncio.TimeoutError):
+                    await builder.build(QSC().width(U(2)).legend("A"), timeout=0.001)
+                cap, _ = await builder.build({"row": 3})
+                return cap
+
+        self.assertTrue(asyncio.run(run()).findSolid().isValid())
+
+    def test_timeout_does_not_kill_other_builds(self):
+        async def run():
+            async with AsyncBuilder(workers=2) as builder:
+                await builder.build_many([{"row": 3}, {"row": 2}])
+                first = builder._pool
+                slow = asyncio.ensure_future(builder.build(QSC().width(U(2)).legend("A")))
+                with self.assertRaises(asyncio.TimeoutError):
+                    await builder.build(QSC().width(U(2.25)).legend("B"), timeout=0.3)
+
+                # New jobs get a fresh pool while the running build finishes in the old one
+                self.assertIsNot(first, builder._pool)
+                self.assertIn(first, builder._pools.values())
+                cap, _ = await slow
+                self.assertNotIn(first, builder._pools.values())
+                return cap
+
+        self.assertTrue(asyncio.run(run()).findSolid().isValid())
+
+    def test_crashed_worker_only_fails_its_own_job(self):
+        async def run():
+            async with AsyncBuilder(workers=3) as builder:
+                return await builder.build_many([{"row": 3}, {"row": 4}, {"row": 2}], return_exceptions=True)
+
+        with mock.patch("qsc.aio.build_brep", _crash_on_row_4):
+            first, crashed, last = asyncio.run(run())
+        self.assertIsInstance(crashed, BrokenProcessPool)
+        self.assertTrue(first[0].findSolid().isValid())
+        self.assertTrue(last[0].findSolid().isValid())
+
+
+if __name__ == '__main__':
+    unittest.main()
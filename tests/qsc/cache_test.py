@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+from qsc.cache import BuildCache, MemoryCache, cached_shape
+from qsc.lazy import cq
+
+
+class CacheTest(unittest.TestCase):
+    def _box(self, size: float = 1) -> cq.Shape:
+        return cq.Workplane("XY").box(size, size, size).findSolid()
+
+    def test_hits_and_misses(self):
+        with tempfile.TemporaryDirectory() as directory:
+            disk = BuildCache(directory)
+            memory = MemoryCache()
+            built = []
+
+            def build():
+                built.append(1)
+                return self._box(2)
+
+            self.assertIsNone(disk.get("box"))
+            shape = cached_shape("box", build, memory, disk)
+            self.assertIs(shape, cached_shape("box", build, memory, disk))
+            self.assertEqual(1, len(built))
+
+            # A fresh process only has the disk entry left
+            memory = MemoryCache()
+            self.assertAlmostEqual(8, cached_shape("box", build, memory, disk).Volume(), places=5)
+            self.assertEqual(1, len(built))
+            self.assertIn("box", memory)
+
+            disk.put("none", [None, self._box()])
+            self.assertIsNone(disk.get("none")[0])
+            self.assertAlmostEqual(1, disk.get("none")[1].Volume(), places=5)
+
+    def test_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as directory:
+            disk = BuildCache(directory)
+            for i, key in enumerate(("a", "b", "c")):
+                disk.put(key, [self._box(i + 1)])
+                os.utime(disk._path(key), (1000 + i, 1000 + i))
+
+            # Reading a refreshes it, so b is the oldest entry
+            self.assertIsNotNone(disk.get("a"))
+            disk._maxBytes = disk.size() - 1
+            disk.put("c", [self._box(3)])
+            self.assertIsNone(disk.get("b"))
+            self.assertIsNotNone(disk.get("a"))
+            self.assertIsNotNone(disk.get("c"))
+            self.assertLessEqual(disk.size(), disk.get_max_bytes())
+
+    def test_recovers_from_bad_entries(self):
+        with tempfile.TemporaryDirectory() as directory:
+            disk = BuildCache(directory)
+            disk.put("box", [self._box()])
+            with open(disk._path("box"), "rb") as f:
+                data = f.read()
+
+            for bad in (b"garbage", data[:len(data) // 2]):
+                with open(disk._path("box"), "wb") as f:
+                    f.write(bad)
+                self.assertIsNone(disk.get("box"))
+                self.assertFalse(os.path.exists(disk._path("box")))
+
+            self.assertAlmostEqual(1, cached_shape("box", self._box, MemoryCache(), disk).Volume(), places=5)
+            self.assertIsNotNone(disk.get("box"))
+
+    def test_memory_cache_is_lru(self):
+        memory = MemoryCache(2)
+        memory.put("a", [None])
+        memory.put("b", [None])
+        memory.get("a")
+        memory.put("c", [None])
+        self.assertIn("a", memory)
+        self.assertNotIn("b", memory)
+        self.assertEqual(2, len(memory))
+
+
+if __name__ == '__main__':
+    unittest.main()
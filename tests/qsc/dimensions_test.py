@@ -0,0 +1,53 @@
+import unittest
+
+from qsc import HomingType, QSC, StepType, U, dimensions, envelopes
+from qsc.dimensions import stem_positions
+
+
+class DimensionsTest(unittest.TestCase):
+    def test_follows_row_and_homing(self):
+        for row in [1, 2, 3, 4]:
+            cap = QSC().row(row).width(U(1.5)).homing(HomingType.SCOOPED)
+            d = cap.dimensions()
+            self.assertAlmostEqual(cap._height, d.height)
+            self.assertAlmostEqual(cap._topThickness, d.top_thickness)
+            self.assertAlmostEqual(U(1.5).mm().get(), d.width)
+            self.assertAlmostEqual(U(1.5).mm().get() + cap._topDiff, d.top_width)
+
+    def test_stems(self):
+        self.assertEqual([(0, 0, 0)], dimensions(QSC()).stems)
+        self.assertEqual([(0, 0, 0), (-12, 0, 0), (12, 0, 0)], dimensions(QSC().width(U(2.25))).stems)
+        self.assertEqual([(0, 0, 0), (-50, 0, 0), (50, 0, 0)], dimensions(QSC().width(U(6.25))).stems)
+        self.assertEqual([(0, 0, 0), (0, -12, 0), (0, 12, 0)], stem_positions(1, 2))
+        self.assertEqual([(0, 0, 0), (1, 2, 3)], stem_positions(7, 1, special=[(1, 2, 3)]))
+
+    def test_stepped(self):
+        cap = QSC().width(U(1.75)).stepped(StepType.LEFT)
+        d = dimensions(cap.spec())
+        x, y, w, l = d.raised
+        offset = cap._stemSettings.get_offset()
+        self.assertAlmostEqual(offset[0], x)
+        self.assertAlmostEqual(offset[1], y)
+        self.assertAlmostEqual(cap._raisedWidth, w)
+        self.assertEqual(1, len(d.stems))
+        self.assertAlmostEqual(offset[0], d.stems[0][0])
+
+    def test_envelopes_match_dimensions(self):
+        rows = [1, 2, 3, 4, 3]
+        widths = [1, 2.25, 6.25, 1.5, 1]
+        scooped = [False, False, False, False, True]
+        e = envelopes(rows, widths, scooped=scooped)
+        for i, (row, width, scoop) in enumerate(zip(rows, widths, scooped)):
+            cap = QSC().row(row).width(U(width))
+            if scoop:
+                cap.homing(HomingType.SCOOPED)
+            d = cap.dimensions()
+            self.assertAlmostEqual(d.height, e["height"][i])
+            self.assertAlmostEqual(d.top_thickness, e["top_thickness"][i])
+            self.assertAlmostEqual(d.top_width, e["top_width"][i])
+            self.assertAlmostEqual(d.dish_depth, e["dish_depth"][i])
+            self.assertEqual(max([0, *(abs(p[0]) for p in d.stems)]), e["stab_x"][i])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import math
+import unittest
+
+from qsc import Dish, DishType, QSC, U
+
+
+class DishTest(unittest.TestCase):
+    def _bounds(self, dish_type: DishType, row: int, inverted: bool):
+        bb = Dish().dish_type(dish_type).row(row)._create_dish(18, 18, inverted).findSolid().BoundingBox()
+        return bb.xlen, bb.ylen, bb.zlen
+
+    def test_revolved_ellipse_matches_the_scaled_sphere(self):
+        for row in (1, 2, 3, 4):
+            for inverted in (False, True):
+                expected = self._bounds(DishType.SCALED_SPHERE, row, inverted)
+                for a, b in zip(expected, self._bounds(DishType.REVOLVED_ELLIPSE, row, inverted)):
+                    self.assertAlmostEqual(a, b, delta=0.05, msg=f'row={row} inverted={inverted}')
+
+    def test_bowls_share_rim_and_depth(self):
+        # The sphere goes through the same rim and bottom as the spheroid and lies
+        # inside it, smaller by the difference of the two volumes: pi d (r^2 - d^2) / 6
+        radius, depth, extension = 12.2, 1.8, 25.0
+        for top in (False, True):
+            bowls = {t: Dish().dish_type(t)._bowl(radius, depth, top, extension).findSolid() for t in DishType}
+            bounds = {t: (round(b.BoundingBox().xlen, 2), round(b.BoundingBox().ylen, 2), round(b.BoundingBox().zlen, 2)) for t, b in bowls.items()}
+            self.assertEqual(1, len(set(bounds.values())), bounds)
+
+            ellipse = bowls[DishType.REVOLVED_ELLIPSE].Volume()
+            self.assertAlmostEqual(bowls[DishType.SCALED_SPHERE].Volume(), ellipse, delta=ellipse * 0.005)
+            self.assertAlmostEqual(math.pi * depth * (radius ** 2 - depth ** 2) / 6, ellipse - bowls[DishType.SPHERICAL].Volume(), delta=0.5)
+
+    def test_unrotated_dishes_match(self):
+        for inverted in (False, True):
+            expected = self._bounds(DishType.SCALED_SPHERE, 3, inverted)
+            for dish_type in (DishType.REVOLVED_ELLIPSE, DishType.SPHERICAL):
+                for a, b in zip(expected, self._bounds(dish_type, 3, inverted)):
+                    self.assertAlmostEqual(a, b, delta=0.05, msg=f'{dish_type} inverted={inverted}')
+
+    def test_revolved_ellipse_has_no_bspline(self):
+        dish = Dish().dish_type(DishType.REVOLVED_ELLIPSE)._create_dish(18, 18, False).findSolid()
+        self.assertNotIn("BSPLINE", {f.geomType() for f in dish.Faces()})
+
+    def test_builds(self):
+        for dish_type in DishType:
+            cap, _ = QSC().width(U(2)).dish_type(dish_type).build()
+            self.assertTrue(cap.findSolid().isValid(), dish_type)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import io
+import os
+import struct
+import tempfile
+import unittest
+import zipfile
+from xml.etree import ElementTree
+
+import numpy as np
+
+from qsc import QSC
+from qsc.export import Mesh, ThreeMFWriter, stl_bytes, tessellate, tessellate_adaptive
+from qsc.lazy import cq
+
+
+class ExportTest(unittest.TestCase):
+    def _shape(self):
+        return cq.Workplane("XY").box(20, 10, 6).edges("|Z").fillet(2).faces(">Z").edges().fillet(0.5).findSolid()
+
+    def _volume(self, mesh: Mesh) -> float:
+        v, t = np.asarray(mesh.vertices), np.asarray(mesh.triangles)
+        return np.einsum("ij,ij->i", v[t[:, 0]], np.cross(v[t[:, 1]], v[t[:, 2]])).sum() / 6
+
+    def test_adaptive_is_smaller_and_closed(self):
+        shape = self._shape()
+        fine = tessellate(shape.copy(), 0.02, 0.02)
+        adaptive = tessellate_adaptive(shape, 0.02)
+        self.assertLess(len(adaptive), len(fine))
+        self.assertAlmostEqual(shape.Volume(), self._volume(adaptive), delta=shape.Volume() * 0.005)
+
+        _, index = np.unique(np.round(adaptive.vertices, 5), axis=0, return_inverse=True)
+        t = index.reshape(-1)[adaptive.triangles]
+        edges = np.sort(np.concatenate([t[:, [0, 1]], t[:, [1, 2]], t[:, [2, 0]]]), axis=1)
+        _, counts = np.unique(edges, axis=0, return_counts=True)
+        self.assertEqual({2}, set(counts.tolist()))
+
+    def test_stl_layout(self):
+        mesh = Mesh([(0, 0, 0), (1, 0, 0), (0, 1, 0)], [(0, 1, 2)])
+        data = stl_bytes(iter([mesh, mesh]))
+        self.assertEqual(84 + 2 * 50, len(data))
+        self.assertEqual(2, struct.unpack("<I", data[80:84])[0])
+        self.assertEqual((0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0), struct.unpack("<12f", data[84:132]))
+
+    def test_3mf_parts(self):
+        # Two triangles sharing an edge, with every corner written twice
+        cap = Mesh([(0, 0, 0), (1, 0, 0), (0, 1, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)], [(0, 1, 2), (3, 4, 5)], "A & B")
+        legend = Mesh([(0, 0, 1), (1, 0, 1), (0, 1, 1)], [(0, 1, 2)], "A & B_LEGEND")
+        stream = io.BytesIO()
+        with ThreeMFWriter(stream) as writer:
+            part = writer.add_part([cap, legend])
+            writer.add_item(part)
+            writer.add_item(part, (30, 0, 0))
+
+        ns = {"m": "http://schemas.microsoft.com/3dmanufacturing/core/2015/02"}
+        with zipfile.ZipFile(stream) as archive:
+            model = ElementTree.fromstring(archive.read("3D/3dmodel.model"))
+        objects = model.findall("m:resources/m:object", ns)
+        self.assertEqual(["0", "1", None], [o.get("pindex") for o in objects])
+        self.assertEqual(4, len(objects[0].findall("m:mesh/m:vertices/m:vertex", ns)))
+        self.assertEqual("A & B", objects[2].get("name"))
+        self.assertEqual(2, len(objects[2].findall("m:components/m:component", ns)))
+        items = model.findall("m:build/m:item", ns)
+        self.assertEqual([objects[2].get("id")] * 2, [i.get("objectid") for i in items])
+
+    def test_step_is_reproducible(self):
+        # A legend cap is an assembly, its usage ids have to be pinned as well
+        cap = QSC().legend("A")
+        with tempfile.TemporaryDirectory() as directory:
+            files = []
+            for _ in range(2):
+                path = cap.export(directory, ("step",))[0]
+                with open(path, "rb") as f:
+                    files.append(f.read())
+                os.remove(path)
+        self.assertIn(b"NEXT_ASSEMBLY_USAGE_OCCURRENCE", files[0])
+        self.assertEqual(files[0], files[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
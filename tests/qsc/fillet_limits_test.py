@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from qsc import DishType, FilletLimits, HollowType, QSC, U
+from qsc.lazy import cq
+
+
+class FilletLimitsTest(unittest.TestCase):
+    def test_narrow(self):
+        self.assertEqual((2, 3), FilletLimits._narrow(0, 4, [1, 2, 3], [True, True, False]))
+        self.assertEqual((0, 1), FilletLimits._narrow(0, 4, [1, 2, 3], [False, True, True]))
+        self.assertEqual((3, 4), FilletLimits._narrow(0, 4, [1, 2, 3], [True, True, True]))
+
+    def test_find_and_persist(self):
+        cap = QSC()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "limits.json")
+            with FilletLimits(path).workers(2).tolerance(0.05) as limits:
+                self.assertIsNone(limits.lookup(cap, "top"))
+                limit = limits.find(cap, "top")
+
+            # The limit fillets, a little more does not
+            shape = FilletLimits._shape(cap, "top")
+            edges = cq.Workplane("XY").add(shape).faces(">Z").findFace().Edges()
+            self.assertTrue(shape.fillet(limit, edges).isValid())
+            self.assertGreater(limit, cap._topFillet)
+
+            limits = FilletLimits(path).workers(1).tolerance(0.05)
+            self.assertEqual(limit, limits.lookup(cap, "top"))
+            self.assertIsNone(limits.lookup(cap.clone().width(U(2)), "top"))
+            self.assertIsNone(limits.lookup(cap, "bottom"))
+            with mock.patch.object(FilletLimits, "_search", side_effect=AssertionError("searched again")):
+                self.assertEqual(limit, limits.find(cap, "top"))
+
+            self.assertEqual(limit, limits.clamp(cap.clone().top_fillet(limit + 1))._topFillet)
+            self.assertEqual(cap._topFillet, limits.clamp(cap)._topFillet)
+
+            # A finer tolerance picks the search up from the stored bracket
+            (entry,) = limits._table.values()
+            lo, hi = entry["bracket"]
+            self.assertLessEqual(hi - lo, 0.05)
+            finer = FilletLimits(path).workers(1).tolerance(0.01)
+            self.assertTrue(lo <= finer.find(cap, "top") <= hi)
+
+    def test_dish_shape_is_part_of_the_key(self):
+        cap = QSC().row(2)
+        tilted = cap.clone()
+        tilted._rowAngle = {**cap._rowAngle, 2: 8}
+        limits = FilletLimits().workers(1).tolerance(0.5)
+        self.assertNotEqual(limits._key(cap, "top"), limits._key(tilted, "top"))
+
+        ellipse = cap.clone().dish_type(DishType.REVOLVED_ELLIPSE)
+        limits.find(cap, "top")
+        self.assertIsNone(limits.lookup(ellipse, "top"))
+        limits.find(ellipse, "top")
+        self.assertEqual({"SCALED_SPHERE", "REVOLVED_ELLIPSE"}, {e["dish_type"] for e in limits._table.values()})
+
+    def test_shelled_caps_are_probed_shelled(self):
+        loft = QSC().dish_type(DishType.REVOLVED_ELLIPSE).top_rect_fillet(2.5).bottom_rect_fillet(2.5)
+        shell = loft.clone().hollow_type(HollowType.SHELL)
+        limits = FilletLimits().workers(1).tolerance(0.05)
+        self.assertNotEqual(limits._key(loft, "bottom"), limits._key(shell, "bottom"))
+        self.assertNotEqual(limits._key(shell, "bottom"), limits._key(shell.clone().wall_thickness(1.5), "bottom"))
+        self.assertEqual(limits._key(loft, "bottom"), limits._key(loft.clone().wall_thickness(1.5), "bottom"))
+
+        # The build fillets a shelled cap after the shell, so that is what gets probed
+        bottoms = [cq.Workplane("XY").add(FilletLimits._shape(c, "bottom")).faces("<Z").findFace() for c in (loft, shell)]
+        self.assertEqual([0, 1], [len(bottom.innerWires()) for bottom in bottoms])
+        limit = limits.find(shell, "bottom")
+        self.assertEqual(["SHELL"], [e["hollow_type"] for e in limits._table.values()])
+        self.assertTrue(shell.clone().bottom_fillet(limit).step(5).build(center=False)[0].findSolid().isValid())
+        with self.assertRaises(ValueError):
+            shell.clone().bottom_fillet(limit + 0.1).step(5).build()
+
+    def test_unknown_fillet(self):
+        with self.assertRaises(ValueError):
+            FilletLimits().lookup(QSC(), "side")
+
+
+if __name__ == '__main__':
+    unittest.main()
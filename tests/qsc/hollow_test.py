@@ -0,0 +1,69 @@
+import math
+import unittest
+
+from qsc import DishType, HollowType, HomingType, QSC, StepType, U, validate
+from qsc.raycast import RayCaster
+
+
+class HollowTest(unittest.TestCase):
+    def _shelled(self) -> QSC:
+        return QSC().hollow_type(HollowType.SHELL).dish_type(DishType.REVOLVED_ELLIPSE).top_rect_fillet(2.5).bottom_rect_fillet(2.5)
+
+    def _walls(self, cap: QSC):
+        # Roof over the center and side wall 1mm up, without stems in the way
+        solid = cap.clone().step(5).build(center=False)[0].findSolid()
+        caster = RayCaster(solid)
+        z = 1
+        ceiling, top, inside, outside = caster.first_hits([((0, 0, -1), (0, 0, 1)), ((0, 0, 100), (0, 0, -1)),
+                                                           ((0, 0, z), (1, 0, 0)), ((100, 0, z), (-1, 0, 0))])
+        return (100 - top) - (ceiling - 1), (100 - outside) - inside
+
+    def _check(self, cap: QSC):
+        loft, _ = cap.clone().hollow_type(HollowType.LOFT).build()
+        shell, _ = cap.clone().build()
+        self.assertTrue(shell.findSolid().isValid())
+        self.assertEqual(1, len(shell.solids().vals()))
+        a, b = loft.findSolid().BoundingBox(), shell.findSolid().BoundingBox()
+        for axis in ("xlen", "ylen", "zlen"):
+            self.assertAlmostEqual(getattr(a, axis), getattr(b, axis), delta=0.01)
+
+    def test_walls_are_wall_thickness(self):
+        for wall in (2, 1.2):
+            cap = self._shelled().wall_thickness(wall)
+            roof, side = self._walls(cap)
+            self.assertAlmostEqual(wall, roof, delta=0.01)
+            # Measured level, so the tapered side is wider than it is thick
+            taper = math.atan(-cap._topDiff / 2 / cap._height)
+            self.assertAlmostEqual(wall / math.cos(taper), side, delta=0.01)
+
+        # The loft walls are level and its roof is what the dish leaves of the top thickness
+        cap = self._shelled().hollow_type(HollowType.LOFT)
+        roof, side = self._walls(cap)
+        self.assertAlmostEqual(2, side, delta=0.01)
+        self.assertAlmostEqual(cap._topThickness - 1 - cap._dishThickness, roof, delta=0.01)
+
+    def test_plain(self):
+        self._check(self._shelled().width(U(2)))
+
+    def test_rows_and_homing(self):
+        self._check(self._shelled().row(1).homing(HomingType.BAR))
+        self._check(self._shelled().inverted().legend("A"))
+
+    def test_rejects_what_can_not_be_shelled(self):
+        for cap in (QSC().hollow_type(HollowType.SHELL),
+                    self._shelled().width(U(1.75)).stepped(StepType.LEFT),
+                    self._shelled().iso_enter(),
+                    self._shelled().bottom_rect_fillet(2)):
+            self.assertTrue(validate(cap))
+            with self.assertRaises(ValueError):
+                cap.build()
+        self.assertEqual({"dish_type", "top_rect_fillet", "bottom_rect_fillet"}, {i.field for i in validate(QSC().hollow_type(HollowType.SHELL))})
+        self.assertEqual([], validate(self._shelled()))
+
+    def test_spec_keeps_hollow_type(self):
+        cap = QSC().hollow_type(HollowType.SHELL)
+        self.assertEqual(HollowType.SHELL, QSC.from_spec(cap.spec())._hollowType)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import unittest
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_CHECK = """
+import sys
+{code}
+heavy = sorted(m for m in sys.modules if m.split(".")[0] in ({roots}))
+print(",".join(heavy))
+"""
+
+
+class ImportTest(unittest.TestCase):
+    def _heavy_modules(self, code: str, roots=("cadquery", "OCP")):
+        result = subprocess.run([sys.executable, "-c", _CHECK.format(code=code, roots=", ".join(map(repr, roots)) + ",")],
+                                cwd=_ROOT, capture_output=True, text=True, check=True)
+        return [m for m in result.stdout.strip().split(",") if m]
+
+    def test_import_does_not_load_cadquery(self):
+        self.assertEqual([], self._heavy_modules("import qsc"))
+
+    def test_settings_do_not_load_cadquery(self):
+        self.assertEqual([], self._heavy_modules(
+            "from qsc import QSC, U, HomingType, StepType\n"
+            "QSC().row(2).width(U(2)).homing(HomingType.BAR).stepped(StepType.LEFT).legend('A').fingerprint()"
+        ))
+
+    def test_import_does_not_load_server_or_asyncio(self):
+        roots = ("asyncio", "concurrent", "http", "multiprocessing")
+        self.assertEqual([], self._heavy_modules("import qsc", roots))
+        self.assertIn("http.server", self._heavy_modules("from qsc import BuildServer", roots))
+        self.assertIn("asyncio", self._heavy_modules("import qsc\nqsc.AsyncBuilder", roots))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from qsc import QSC
+from qsc.instrumentation import _counts
+from qsc.lazy import cq
+
+
+class InstrumentationTest(unittest.TestCase):
+    def _count(self, run):
+        counts = _counts()
+        booleans, fillets = counts["boolean"], counts["fillet"]
+        run()
+        return counts["boolean"] - booleans, counts["fillet"] - fillets
+
+    def test_shape_operations(self):
+        box = cq.Workplane("XY").box(4, 4, 4)
+        solid = box.findSolid()
+        compound = cq.Compound.makeCompound([solid])
+        tool = cq.Workplane("XY").box(2, 2, 8).findSolid()
+
+        self.assertEqual((1, 0), self._count(lambda: solid.cut(tool)))
+        self.assertEqual((1, 0), self._count(lambda: compound.cut(tool)))
+        self.assertEqual((1, 0), self._count(lambda: compound.fuse(tool)))
+        self.assertEqual((1, 0), self._count(lambda: compound.intersect(tool)))
+        self.assertEqual((1, 0), self._count(lambda: box.cut(tool)))
+        self.assertEqual((0, 1), self._count(lambda: box.edges("|Z").fillet(0.5)))
+        self.assertEqual((0, 1), self._count(lambda: compound.chamfer(0.5, None, compound.Edges()[:1])))
+        self.assertEqual((0, 0), self._count(lambda: cq.Wire.makePolygon([(0, 0), (1, 0), (1, 1)], close=True).fillet(0.1)))
+
+    def test_build(self):
+        QSC().legend("A").build()
+        events = []
+        QSC().legend("B").on_stage(events.append).build()
+        counts = {e.stage: (e.booleans, e.fillets) for e in events}
+        # With the templates warm: one cut for the dish, two fillets, one cut for the legend
+        self.assertEqual((1, 0), counts["dish"])
+        self.assertEqual((0, 2), counts["fillet"])
+        self.assertEqual((1, 0), counts["legend"])
+        self.assertEqual(tuple(map(sum, zip(*(c for stage, c in counts.items() if stage != "build")))), counts["build"])
+
+
+if __name__ == '__main__':
+    unittest.main()
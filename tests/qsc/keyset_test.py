@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+import unittest
+
+from qsc import Keyset, Quality
+
+# A cut down ISO layout: a metadata block, a 2.25u row with an offset, the ISO enter and a spacebar row
+_LAYOUT = [
+    {"name": "ISO"},
+    ["Esc", {"x": 1}, "F1"],
+    [{"w": 1.5}, "Tab", "Q", {"x": 0.25, "w": 1.25, "h": 2, "w2": 1.5, "h2": 1, "x2": -0.25}, "Enter"],
+    [{"w": 1.75}, "Caps", "A"],
+    [{"w": 1.25}, "Shift", "<"],
+    [{"p": "R4"}, "Ctrl", {"w": 6.25}, "", {"y": 0.5, "w": 2, "h": 1}, "\n\nAltGr"],
+]
+
+
+class KeysetTest(unittest.TestCase):
+    def _keys(self, layout=_LAYOUT, legends=True):
+        return [(x, y, cap.spec()) for x, y, cap in Keyset.from_kle(layout, legends).keys()]
+
+    def test_iso_enter(self):
+        keys = {spec.legend: spec for _, _, spec in self._keys()}
+        self.assertTrue(keys["Enter"].iso_enter)
+        self.assertEqual((("u", 1.5), ("u", 2)), (keys["Enter"].width, keys["Enter"].length))
+        self.assertEqual(["Enter"], [legend for legend, spec in keys.items() if spec.iso_enter])
+        # A plain 2u tall key is not an ISO enter
+        self.assertFalse(self._keys([[{"h": 2}, "+"]])[0][2].iso_enter)
+
+    def test_rows(self):
+        rows = {spec.legend: spec.row for _, _, spec in self._keys()}
+        self.assertEqual({"Esc": 1, "F1": 1, "Tab": 2, "Q": 2, "Enter": 2, "Caps": 3, "A": 3, "Shift": 4, "<": 4, "Ctrl": 4, None: 4, "AltGr": 4},
+                         rows)
+        self.assertEqual([4, 4], [spec.row for _, _, spec in self._keys([["A"], ["B"]])])
+        self.assertEqual([2, 2], [spec.row for _, _, spec in self._keys([[{"p": "DSA R2"}, "A", "B"]])])
+
+    def test_widths_and_offsets(self):
+        keys = {spec.legend: (x, y, spec.width[1], spec.length[1]) for x, y, spec in self._keys()}
+        self.assertEqual((2.0, 0.0, 1, 1), keys["F1"])
+        self.assertEqual((0.0, 1.0, 1.5, 1), keys["Tab"])
+        self.assertEqual((1.5, 1.0, 1, 1), keys["Q"])
+        self.assertEqual((2.75, 1.0), keys["Enter"][:2])
+        self.assertEqual((1.75, 2.0, 1, 1), keys["A"])
+        self.assertEqual((7.25, 4.5, 2, 1), keys["AltGr"])
+
+        spacebar = [spec for x, y, spec in self._keys() if (x, y) == (1.0, 4.0)][0]
+        self.assertEqual(6.25, spacebar.width[1])
+        self.assertIsNone(spacebar.legend)
+        self.assertFalse(any(spec.legend for _, _, spec in self._keys(legends=False)))
+
+    def test_from_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "layout.json")
+            with open(path, "w") as f:
+                json.dump(_LAYOUT, f)
+            self.assertEqual(self._keys(), self._keys(path))
+        self.assertEqual(self._keys(), self._keys(json.dumps(_LAYOUT)))
+
+    def _duplicates(self) -> Keyset:
+        return Keyset([{"row": 3}, {"row": 2, "width": 2}, {"row": 3}]).quality(Quality.DRAFT).workers(2)
+
+    def test_build_dedups_over_workers(self):
+        keyset = self._duplicates()
+        self.assertEqual(2, len(keyset.unique()))
+        built = keyset.build()
+        self.assertEqual([cap for _, _, cap in keyset.keys()], [cap for cap, _ in built])
+        # Both row 3 keys get the one shape built for their spec
+        self.assertIs(built[0][1], built[2][1])
+        self.assertAlmostEqual(built[0][1][0].findSolid().Volume(), built[2][1][0].findSolid().Volume())
+        for _, (cap, legend) in built:
+            self.assertTrue(cap.findSolid().isValid())
+            self.assertIsNone(legend)
+        self.assertGreater(built[1][1][0].findSolid().BoundingBox().xlen, built[0][1][0].findSolid().BoundingBox().xlen)
+
+    def test_export(self):
+        keyset = self._duplicates()
+        with tempfile.TemporaryDirectory() as directory:
+            paths = keyset.export(directory)
+            names = sorted(cap.clone().quality(Quality.DRAFT).name() + ".stl" for cap in keyset.unique().values())
+            self.assertEqual(names, sorted(os.path.basename(p) for p in paths))
+            self.assertTrue(all(os.path.getsize(p) > 0 for p in paths))
+            self.assertEqual(sorted(paths), sorted(keyset.export(directory)))
+
+    def test_export_legend_with_path_separator(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = Keyset.from_kle([["/"]]).export(directory)
+            self.assertEqual(2, len(paths))
+            self.assertEqual({directory}, {os.path.dirname(p) for p in paths})
+            self.assertTrue(all(os.path.exists(p) for p in paths))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from qsc import HomingType, Manifest, QSC
+
+
+class ManifestTest(unittest.TestCase):
+    def _write(self, directory: str, cap: QSC, content: bytes = b"solid") -> str:
+        path = os.path.join(directory, cap.name() + ".stl")
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def test_names_differ_by_spec(self):
+        self.assertNotEqual(QSC().name(), QSC().homing(HomingType.BAR).name())
+        self.assertEqual(QSC().name(), QSC().name())
+        self.assertRegex(QSC().legend("<b>1/2</b>").name(), r"^qsc_row3_1x1__b_1_2__b__[0-9a-f]{8}$")
+        self.assertNotEqual(QSC().legend("/").name(), QSC().legend("_").name())
+
+    def test_current(self):
+        cap = QSC()
+        with tempfile.TemporaryDirectory() as directory:
+            manifest = Manifest(directory)
+            self.assertIsNone(manifest.current(cap))
+            path = self._write(directory, cap)
+            manifest.record(cap, [path])
+            manifest.save()
+
+            manifest = Manifest(directory)
+            self.assertEqual([path], manifest.current(cap))
+            self.assertIsNone(manifest.current(cap, tolerance=0.1))
+            self.assertIsNone(manifest.current(cap, ("stl", "3mf")))
+            self.assertIsNone(manifest.current(QSC().homing(HomingType.SCOOPED)))
+
+            self._write(directory, cap, b"changed")
+            self.assertIsNone(manifest.current(cap))
+
+    def test_prunes_deleted_files(self):
+        cap, other = QSC(), QSC().homing(HomingType.BAR)
+        with tempfile.TemporaryDirectory() as directory:
+            manifest = Manifest(directory)
+            kept, deleted = self._write(directory, cap), self._write(directory, other)
+            manifest.record(cap, [kept])
+            manifest.record(other, [deleted])
+            os.remove(deleted)
+            manifest.save()
+            self.assertEqual([os.path.basename(kept)], list(Manifest(directory).files()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+import numpy as np
+
+from qsc import DishType, HomingType, QSC, StepType, U, cap_mesh
+
+
+class MeshTest(unittest.TestCase):
+    def _volume(self, mesh) -> float:
+        v, t = mesh.vertices, mesh.triangles
+        return np.einsum("ij,ij->i", v[t[:, 0]], np.cross(v[t[:, 1]], v[t[:, 2]])).sum() / 6
+
+    def test_watertight(self):
+        for cap in [QSC(), QSC().row(1).width(U(2.25)), QSC().row(4).width(U(6.25)).dish_type(DishType.SPHERICAL)]:
+            t = cap.mesh().triangles
+            edges = np.sort(np.concatenate([t[:, [0, 1]], t[:, [1, 2]], t[:, [2, 0]]]), axis=1)
+            _, counts = np.unique(edges, axis=0, return_counts=True)
+            self.assertEqual({2}, set(counts.tolist()))
+
+    def test_matches_the_build(self):
+        # The mesh leaves out fillets and stems, so only the walls and dish are compared
+        for cap in [QSC().row(1), QSC().row(2).width(U(2)).homing(HomingType.SCOOPED), QSC().row(4).width(U(1.5))]:
+            mesh = cap_mesh(cap)
+            built, _ = cap.clone().step(5).build()
+            solid = built.findSolid()
+            bb = solid.BoundingBox()
+            size = mesh.vertices.max(axis=0) - mesh.vertices.min(axis=0)
+            for i, axis in enumerate(("xlen", "ylen", "zlen")):
+                self.assertAlmostEqual(getattr(bb, axis), size[i], delta=0.6)
+            self.assertAlmostEqual(solid.Volume(), self._volume(mesh), delta=solid.Volume() * 0.03)
+
+    def test_plain_caps_only(self):
+        with self.assertRaises(ValueError):
+            QSC().width(U(1.75)).stepped(StepType.LEFT).mesh()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from qsc import Plate, QSC, U, shelf_pack
+from qsc.export import Mesh
+
+
+class PlateTest(unittest.TestCase):
+    def test_shelf_pack(self):
+        rng = np.random.default_rng(7)
+        sizes = np.column_stack([rng.choice([19.05, 23.8, 42.9, 119], 500), rng.choice([19.05, 38.1], 500)])
+        plates, corners = shelf_pack(sizes, (220, 220), 3)
+        far = corners + sizes
+        self.assertTrue(np.all(far <= 220))
+        for plate in range(plates.max() + 1):
+            on = np.flatnonzero(plates == plate)
+            lo, hi = corners[on], far[on]
+            overlap = (lo[:, None, 0] < hi[None, :, 0]) & (lo[None, :, 0] < hi[:, None, 0]) & (lo[:, None, 1] < hi[None, :, 1]) & (lo[None, :, 1] < hi[:, None, 1])
+            self.assertEqual(len(on), overlap.sum())
+
+    def test_too_big(self):
+        with self.assertRaises(ValueError):
+            shelf_pack([(300, 10)], (220, 220))
+
+    def test_export(self):
+        legend = Mesh([(0, 0, 0), (1, 0, 0), (0, 1, 0), (0, 0, 1)], [(0, 2, 1), (0, 1, 3), (0, 3, 2), (1, 2, 3)], "A_LEGEND")
+        plate = (Plate()
+                 .bed(100, 100)
+                 .add_meshes([QSC().width(U(2)).mesh(), legend], 6)
+                 .add_meshes([QSC().length(U(2)).mesh()], 2)
+                 )
+        layout = plate.layout()
+        self.assertEqual(8, sum(len(placements) for placements in layout))
+        with tempfile.TemporaryDirectory() as directory:
+            paths = plate.export(directory, formats=("stl", "3mf"))
+            self.assertEqual({"plate_1.stl", "plate_1_LEGEND.stl", "plate_1.3mf"}, {os.path.basename(p) for p in paths[:3]})
+            self.assertEqual(len(layout) * 2 + sum(1 for placements in layout if any(i < 6 for i, _, _ in placements)), len(paths))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+
+from qsc import Keyset, QSC, Quality, U
+
+
+class QualityTest(unittest.TestCase):
+    def test_draft_keeps_the_envelope(self):
+        for row in [1, 2, 3, 4]:
+            cap = QSC().row(row).width(U(2)).legend("A")
+            final, _ = cap.build()
+            draft, legend = cap.clone().quality(Quality.DRAFT).build()
+            self.assertIsNone(legend)
+            a, b = final.findSolid().BoundingBox(), draft.findSolid().BoundingBox()
+            for axis in ("xlen", "ylen", "zlen"):
+                self.assertAlmostEqual(getattr(a, axis), getattr(b, axis), delta=0.6)
+
+    def test_draft_is_a_different_cap(self):
+        self.assertNotEqual(QSC().fingerprint(), QSC().quality(Quality.DRAFT).fingerprint())
+
+    def test_keyset_quality(self):
+        built = Keyset([{"row": 3}, {"row": 2}]).workers(1).quality(Quality.DRAFT).build()
+        self.assertEqual(2, len(built))
+        self.assertEqual(Quality.FINAL, built[0][0]._quality)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from unittest import mock
+
+from qsc import BuildClient, BuildServer, qsc_from_dict
+from qsc.cache import shape_from_brep
+
+
+class BuildServerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = BuildServer().workers(1).max_builds(2).warm(False).start()
+        self.client = BuildClient(self.server.address(), timeout=120)
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def test_health(self):
+        health = self.client.health()
+        self.assertEqual(1, health["workers"])
+        self.assertEqual(0, health["builds"])
+
+    def test_rejects_unknown_spec_keys(self):
+        with self.assertRaises(ValueError):
+            self.client.build({"row": 3, "colour": "red"})
+
+    def test_rejects_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.client.build({"row": 3}, format="obj")
+
+    def test_recycles_workers(self):
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                self.client.build({"bogus": True})
+        health = self.client.health()
+        self.assertEqual(3, health["builds"])
+        self.assertEqual(1, health["recycled"])
+
+    def test_build(self):
+        name = qsc_from_dict({"row": 3, "width": 1, "legend": "A"}).name()
+        self.assertTrue(name.startswith("qsc_row3_1x1_A_"))
+        result = self.client.build({"row": 3, "width": 1, "legend": "A"})
+        self.assertEqual([name, name + "_LEGEND"], list(result.keys()))
+        cap = shape_from_brep(result[name])
+        self.assertTrue(cap.isValid())
+
+        stl = self.client.build({"row": 3, "width": 1}, format="stl")[qsc_from_dict({"row": 3, "width": 1}).name()]
+        self.assertEqual(b"qsc", stl[:3])
+
+    def test_busy_server_answers_503(self):
+        self.server.queue_timeout(0.5)
+        worker = self.server._idle.get()
+        try:
+            with self.assertRaises(RuntimeError):
+                self.client.build({"row": 3})
+        finally:
+            self.server._idle.put(worker)
+
+    def test_retries_failed_spawns(self):
+        fresh = self.server._spawn()
+        with mock.patch.object(self.server, "_spawn", side_effect=[RuntimeError("Build worker failed to start"), fresh]), \
+                mock.patch("sys.stderr"):
+            self.server._replace(self.server._idle.get())
+            # The first spawn fails, the retry a second later puts a worker back
+            self.assertIs(fresh, self.server._idle.get(timeout=30))
+        self.server._idle.put(fresh)
+
+
+if __name__ == '__main__':
+    unittest.main()
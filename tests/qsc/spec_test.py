@@ -0,0 +1,53 @@
+import pickle
+import unittest
+
+from qsc import QSC, QSCSpec, HomingType, StepType, U
+from qsc.fingerprint import state
+
+
+class QSCSpecTest(unittest.TestCase):
+    def _cap(self):
+        return QSC().row(2).width(U(2)).stepped(StepType.LEFT).homing(HomingType.BAR).legend("A")
+
+    def test_round_trips(self):
+        spec = self._cap().spec()
+        self.assertEqual(spec, QSCSpec.from_json(spec.to_json()))
+        self.assertEqual(spec, QSCSpec.from_dict(spec.to_dict()))
+        self.assertEqual(spec, pickle.loads(pickle.dumps(spec)))
+        self.assertEqual(spec, QSC.from_spec(spec).spec())
+        self.assertEqual(spec.digest(), QSCSpec.from_json(spec.to_json()).digest())
+
+    def test_equal_caps_have_equal_specs(self):
+        self.assertEqual(self._cap().spec(), self._cap().spec())
+        self.assertEqual(hash(self._cap().spec()), hash(self._cap().spec()))
+        self.assertNotEqual(self._cap().spec(), self._cap().row(3).spec())
+        self.assertEqual(QSC().width(U(2)).spec(), QSC().width(U(2.0)).spec())
+
+    def test_frozen(self):
+        spec = QSC().spec()
+        with self.assertRaises(AttributeError):
+            spec.row = 2
+        self.assertEqual(2, spec.replace(row=2).row)
+        self.assertEqual(3, spec.row)
+
+    def test_covers_every_setting(self):
+        spec = QSC().spec()
+        runtime = {"_cache", "_stageCache", "_stageHooks"}
+        self.assertEqual(set(state(QSC()).keys()) - runtime, set(spec.attributes().keys()))
+
+    def test_stepped_does_not_leak(self):
+        self._cap()
+        self.assertEqual((0, 0, 0), QSC()._stemSettings.get_offset())
+        settings = QSC()._stemSettings
+        QSC().stem_settings(settings).stepped(StepType.LEFT)
+        self.assertEqual((0, 0, 0), settings.get_offset())
+
+    def test_clone_is_independent(self):
+        cap = self._cap()
+        clone = cap.clone().row(3)
+        self.assertNotEqual(cap.spec(), clone.spec())
+        self.assertIsNot(cap._stemSettings, clone._stemSettings)
+
+
+if __name__ == '__main__':
+    unittest.main()
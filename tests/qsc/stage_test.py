@@ -0,0 +1,31 @@
+import unittest
+
+from qsc import QSC
+from qsc.cache import MemoryCache
+
+
+class StageTest(unittest.TestCase):
+    def _build(self, cap: QSC):
+        events = []
+        _, legend = cap.on_stage(events.append).build()
+        return {e.stage: e.cached for e in events if e.stage != "build"}, legend
+
+    def test_legend_reuses_upstream_stages(self):
+        stages = MemoryCache()
+        first, _ = self._build(QSC().legend("A").stage_cache(stages))
+        self.assertFalse(any(first.values()))
+
+        second, legend = self._build(QSC().legend("B").stage_cache(stages))
+        self.assertEqual({"base": True, "dish": True, "fillet": True, "homing": True, "hollow": True, "stems": True, "legend": False},
+                         second)
+        self.assertIsNotNone(legend)
+
+    def test_base_is_tagged_on_a_hit(self):
+        stages = MemoryCache()
+        for _ in range(2):
+            cap = QSC().step(1).stage_cache(stages)
+            self.assertIn("base", cap._build()[2].ctx.tags)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,23 @@
+import unittest
+
+from qsc import QSC, StepType, SupportMode, U
+
+
+class SupportTest(unittest.TestCase):
+    def _solids(self, cap: QSC):
+        return [cap.clone().support_mode(mode).build()[0].findSolid() for mode in (SupportMode.EXTRUDE, SupportMode.RAYCAST)]
+
+    def test_raycast_matches_extrude(self):
+        for cap in (QSC(), QSC().width(U(2)).row(1), QSC().width(U(1.75)).stepped(StepType.LEFT), QSC().inverted(), QSC().iso_enter()):
+            extruded, raycast = self._solids(cap)
+            self.assertTrue(raycast.isValid())
+            self.assertAlmostEqual(extruded.Volume(), raycast.Volume(), delta=0.01)
+            self.assertEqual(len(extruded.Faces()), len(raycast.Faces()))
+
+    def test_extrude_is_the_default(self):
+        self.assertEqual(SupportMode.EXTRUDE, QSC()._supportMode)
+        self.assertEqual(SupportMode.RAYCAST, QSC().support_mode(SupportMode.RAYCAST)._supportMode)
+
+
+if __name__ == '__main__':
+    unittest.main()
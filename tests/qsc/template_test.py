@@ -0,0 +1,82 @@
+import unittest
+from unittest import mock
+
+from qsc import CherrySettings, Dish, DishType, Legend, LegendSettings, MM, QSC, Stem, U
+from qsc import dish
+from qsc import qsc
+from qsc.legend import legend
+from qsc.lazy import cq
+
+
+class TemplateTest(unittest.TestCase):
+    def _counting(self, owner, name: str):
+        # Wraps a method so every call runs the real one and is counted
+        original = getattr(owner, name)
+        calls = []
+
+        def wrapper(*args, **kwargs):
+            calls.append(args)
+            return original(*args, **kwargs)
+
+        return mock.patch.object(owner, name, wrapper), calls
+
+    def test_dish_templates(self):
+        dish._templates.clear()
+        patch, calls = self._counting(Dish, "_create_dish")
+        with patch:
+            first = Dish().row(2)._template(18, 18, False).val()
+            self.assertIs(first, Dish().row(2)._template(18, 18, False).val())
+            self.assertIs(first, Dish().row(2)._template(18.00001, 18, False).val())
+            self.assertEqual(1, len(calls))
+
+            self.assertIsNot(first, Dish().row(3)._template(18, 18, False).val())
+            Dish().row(2)._template(18, 18, True)
+            Dish().row(2)._template(37, 18, False)
+            Dish().row(2).dish_type(DishType.REVOLVED_ELLIPSE)._template(18, 18, False)
+            self.assertEqual(5, len(calls))
+            self.assertEqual(5, len(dish._templates))
+
+    def test_stem_templates(self):
+        qsc._stemTemplates.clear()
+        patch, calls = self._counting(Stem, "build")
+        with patch:
+            first = QSC()._stem(5)
+            self.assertIs(first, QSC()._stem(5))
+            # The offset only moves the located copies
+            self.assertIs(first, QSC().stem_settings(CherrySettings().offset((1, 0, 0)))._stem(5))
+            self.assertEqual(1, len(calls))
+
+            self.assertIsNot(first, QSC()._stem(6))
+            QSC().stem_settings(CherrySettings().radius(MM(3)))._stem(5)
+            QSC().stem_settings(CherrySettings().rotation(90))._stem(5)
+            self.assertEqual(4, len(calls))
+
+            # A second 2u cap places the stem and stabs built for the first one
+            QSC().width(U(2)).build()
+            built = len(calls)
+            QSC().width(U(2)).build()
+            self.assertEqual(built, len(calls))
+
+    def test_glyph_templates(self):
+        legend._glyphs.clear()
+        patch, calls = self._counting(cq.Compound, "makeText")
+        with patch:
+            first = Legend(LegendSettings().legend("A").distance(1.2))._glyph()
+            self.assertIs(first, Legend(LegendSettings().legend("A").distance(1.2))._glyph())
+            self.assertEqual(1, len(calls))
+
+            self.assertIsNot(first, Legend(LegendSettings().legend("B").distance(1.2))._glyph())
+            Legend(LegendSettings().legend("A").distance(1.2).font_size(4))._glyph()
+            Legend(LegendSettings().legend("A").distance(0.6))._glyph()
+            self.assertEqual(4, len(calls))
+
+            # Caps with the same legend place one glyph solid on their own faces
+            QSC().legend("C").build()
+            built = len(calls)
+            _, placed = QSC().width(U(2)).legend("C").build()
+            self.assertEqual(built, len(calls))
+            self.assertIsNotNone(placed)
+
+
+if __name__ == '__main__':
+    unittest.main()
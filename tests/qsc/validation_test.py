@@ -0,0 +1,54 @@
+import unittest
+
+from qsc import HomingType, QSC, StepType, U, validate
+
+
+class ValidationTest(unittest.TestCase):
+    def _fields(self, cap: QSC):
+        return {issue.field for issue in validate(cap)}
+
+    def test_defaults_are_valid(self):
+        for row in [1, 2, 3, 4]:
+            for width in [1, 1.25, 1.5, 1.75, 2, 2.25, 2.75, 6.25, 7]:
+                self.assertEqual([], validate(QSC().row(row).width(U(width))))
+                self.assertEqual([], validate(QSC().row(row).width(U(width)).stepped(StepType.LEFT)))
+                self.assertEqual([], validate(QSC().row(row).width(U(width)).homing(HomingType.SCOOPED).legend("A")))
+            self.assertEqual([], validate(QSC().row(row).iso_enter()))
+
+    def test_fillet_too_big(self):
+        self.assertIn("top_fillet", self._fields(QSC().row(1).top_fillet(30).dish_thickness(3)))
+        self.assertIn("bottom_fillet", self._fields(QSC().bottom_fillet(3)))
+
+    def test_wall_too_thick(self):
+        self.assertIn("wall_thickness", self._fields(QSC().wall_thickness(6)))
+
+    def test_stabilizers_fit(self):
+        def stabs(cap):
+            return [i for i in validate(cap) if "stabilizer" in i.message]
+
+        self.assertTrue(stabs(QSC().width(U(2)).wall_thickness(3)))
+        self.assertEqual([], stabs(QSC().width(U(6.25)).wall_thickness(3)))
+        self.assertEqual([], stabs(QSC().width(U(2)).wall_thickness(3).disable_stabs()))
+        # 6u and wider caps have their stabilizers 50mm out
+        self.assertTrue(stabs(QSC().width(U(6)).wall_thickness(3)))
+        self.assertTrue(stabs(QSC().width(U(6.25)).special_stab_placement([(-60, 0, 0), (60, 0, 0)])))
+
+    def test_step_too_wide(self):
+        self.assertIn("stepped", self._fields(QSC().width(U(1.75)).stepped(StepType.LEFT, raised_width=U(2))))
+
+    def test_legend_too_wide(self):
+        self.assertIn("legend", self._fields(QSC().legend("Backspace", font_size=6)))
+        self.assertEqual(set(), self._fields(QSC().width(U(2)).legend("Bksp", font_size=6)))
+
+    def test_does_not_touch_the_cap(self):
+        cap = QSC().row(2).legend("A")
+        spec = cap.spec()
+        validate(cap)
+        self.assertEqual(spec, cap.spec())
+
+    def test_geometry(self):
+        self.assertEqual([], validate(QSC().width(U(2)), geometry=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,21 +11,20 @@ from qsc import (
 
 
 def show(cap: QSC, rotate=False):
-    c = cap.build()
     if rotate:
-        show_object(cap._rotate(c[0]), options={"color": (200, 20, 100)})
-        if cap._legend is not None:
-            show_object(cap._rotate(c[1]), options={"color": (90, 200, 40)})
+        # Laid on its side the way it gets printed
+        c = [shape for _, shape in cap.printable()]
     else:
-        show_object(c[0], options={"color": (200, 20, 100)})
-        if cap._legend is not None:
-            show_object(c[1], options={"color": (90, 200, 40)})
+        c = cap.build()
+    show_object(c[0], options={"color": (200, 20, 100)})
+    if cap._legend is not None:
+        show_object(c[1], options={"color": (90, 200, 40)})
 
 
 cap = (QSC()
        .row(3)
        .width(U(3))
-       .legend("Hi", fontSize=6)
+       .legend("Hi", font_size=6)
        .inverted()
        .homing(HomingType.BAR)
        )